@@ -1,11 +1,42 @@
-from .baiduTo123 import baiduTo123
-from .downfile import DownFile
-from .file import File
-from .upload import Upload
-from .uploadfile import UploadFile
-from .user import User
-from .utils.auth import Auth
-from .utils.const import APPNAME
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .baiduTo123 import baiduTo123
+    from .downfile import DownFile
+    from .file import File
+    from .upload import Upload
+    from .uploadfile import UploadFile
+    from .user import User
+    from .utils.auth import Auth
+    from .utils.const import APPNAME
+
+# 属性 -> 所在模块, 第一次访问时才导入, `import cpanbd` 不会读取配置或导入依赖
+_LAZY_ATTRS = {
+    "Auth": ".utils.auth",
+    "File": ".file",
+    "Upload": ".upload",
+    "UploadFile": ".uploadfile",
+    "User": ".user",
+    "DownFile": ".downfile",
+    "APPNAME": ".utils.const",
+    "baiduTo123": ".baiduTo123",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    if name != "APPNAME":  # APPNAME 随环境变量变化, 不缓存
+        globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
+
 
 __all__ = [
     "Auth",
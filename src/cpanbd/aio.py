@@ -0,0 +1,325 @@
+"""异步接口
+
+`File`、`Upload`、`User`、`UploadFile` 的 asyncio 版本, 使用同一份 apijson 接口定义,
+请求通过 `httpx.AsyncClient` 发送, 每个客户端的并发数由 `max_concurrency` 限制.
+
+!!! note "注意"
+    依赖 `httpx` 库, 请先安装 `pip install "cpanbd[aio]"`
+
+Example:
+```python
+import asyncio
+
+from cpanbd.aio import AsyncFile
+
+
+async def main():
+    file = AsyncFile(max_concurrency=32)
+    dirs = ["/a", "/b", "/c"]
+    results = await asyncio.gather(*(file.list_files(dir=d) for d in dirs))
+    for res in results:
+        print(len(res["list"]))
+
+
+asyncio.run(main())
+```
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Literal, Optional
+
+from pydantic import validate_call
+
+from .file import File
+from .upload import Upload
+from .uploadfile import (
+    UINFO_ERRORS,
+    choose_block_size,
+    missing_blocks,
+    uinfo_failed,
+    vip_type_from_uinfo,
+)
+from .user import User
+from .utils.api import Auth
+from .utils.baseapiclient import DEFAULT_MAX_CONCURRENCY, AsyncBaseApiClient
+from .utils.md5 import encrypt_md5, hash_file
+from .utils.session import AIO_IMPORT_ERROR
+from .utils.validation import ValidationMode, ValidationPolicy
+
+try:
+    import httpx  # noqa: F401
+except ImportError as e:
+    raise ImportError(AIO_IMPORT_ERROR) from e
+
+
+def _sync_only(name: str) -> Callable:
+    def method(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError(
+            f"❌ {type(self).__name__} 不支持 {name}, 它按同步接口调用; "
+            f"请使用 {type(self).__name__.removeprefix('Async')}.{name}"
+        )
+
+    method.__name__ = name
+    return method
+
+
+def _endpoints_only(cls: type) -> type:
+    """屏蔽同步类上基于接口封装的辅助方法 (iter_listall、walk 等)
+
+    这些方法把接口的返回值当作 dict 使用, 在异步类上接口返回的是协程, 直接调用会出错.
+    接口方法由 `auto_args_call_api` 包装 (带 `__wrapped__`), 不受影响.
+    """
+    for base in cls.__mro__[1:]:
+        if base not in (File, Upload, User):
+            continue
+        for name, attr in vars(base).items():
+            if (
+                not name.startswith("_")
+                and callable(attr)
+                and not hasattr(attr, "__wrapped__")
+                and name not in vars(cls)
+            ):
+                setattr(cls, name, _sync_only(name))
+    return cls
+
+
+@_endpoints_only
+class AsyncFile(File, AsyncBaseApiClient):
+    """`File` 的异步版本, 所有接口方法都需要 `await`"""
+
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        super().__init__(auth=auth, validation=validation)
+        self.max_concurrency = max_concurrency
+
+
+@_endpoints_only
+class AsyncUpload(Upload, AsyncBaseApiClient):
+    """`Upload` 的异步版本, 所有接口方法都需要 `await`"""
+
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        super().__init__(auth=auth, validation=validation)
+        self.max_concurrency = max_concurrency
+
+
+@_endpoints_only
+class AsyncUser(User, AsyncBaseApiClient):
+    """`User` 的异步版本, 所有接口方法都需要 `await`"""
+
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        super().__init__(auth=auth, validation=validation)
+        self.max_concurrency = max_concurrency
+
+
+class AsyncUploadFile:
+    """`UploadFile` 的异步版本, 分片通过协程并发上传
+
+    Example:
+    ```python
+    import asyncio
+
+    from cpanbd import APPNAME
+    from cpanbd.aio import AsyncUploadFile
+
+    pan = AsyncUploadFile()
+    asyncio.run(
+        pan.upload_file(
+            local_filename="tdata/Robot0309.zip",
+            upload_path=f"/apps/{APPNAME}/tdata/Robot0309.zip",
+        )
+    )
+    ```
+    """
+
+    def __init__(self, auth: Optional[Auth] = None) -> None:
+        self.up = AsyncUpload(auth=auth)
+        self._vip_type: Optional[int] = None
+
+    async def get_vip_type(self) -> int:
+        """当前账号的会员类型, 只请求一次. 获取失败时按普通用户处理"""
+        if self._vip_type is None:
+            try:
+                res = await AsyncUser(auth=self.up.auth).uinfo()
+                self._vip_type = vip_type_from_uinfo(res)
+            except UINFO_ERRORS as e:
+                self._vip_type = uinfo_failed(e)
+        return self._vip_type
+
+    async def upload_part(
+        self,
+        server_url: str,
+        upload_path: str,
+        uploadid: str,
+        idx: int,
+        chunk: bytes,
+        expected_md5: str,
+    ) -> int:
+        """
+        上传单个文件分片.
+
+        Args:
+            server_url (str): 上传服务器的 URL.
+            upload_path (str): 文件在网盘中的目标路径.
+            uploadid (str): 上传会话的 ID.
+            idx (int): 当前分片的索引.
+            chunk (bytes): 当前分片的二进制数据.
+            expected_md5 (str): 当前分片的预期 MD5 值.
+
+        Returns:
+            int: 成功上传的分片索引.
+
+        Raises:
+            Exception: 如果上传失败或 MD5 校验不一致.
+        """
+        files = {"file": ("part", chunk)}
+        res = await self.up.upload(
+            url=server_url + "/rest/2.0/pcs/superfile2",
+            path=upload_path,
+            uploadid=uploadid,
+            partseq=idx,
+            files=files,
+        )
+        if not res or not res.get("md5"):
+            raise Exception(f"上传分片失败: {res}")
+        if res["md5"] != expected_md5:
+            raise Exception(
+                f"分片 {idx} 的 MD5 不一致: 预期 {expected_md5}, 实际 {res['md5']}"
+            )
+        return idx
+
+    @validate_call
+    async def upload_file(
+        self,
+        local_filename: str,
+        upload_path: str,
+        isdir: Literal[0, 1] = 0,
+        rtype: Literal[1, 2, 3] = 1,
+        max_workers: Optional[int] = None,
+        bs: Optional[Literal[4, 16, 32]] = None,
+        show_progress: bool = True,
+    ) -> None | dict:
+        """
+        使用协程将本地文件上传到百度网盘, 参数与 `UploadFile.upload_file` 相同.
+
+        同一时刻最多读取 `max_workers` 个分片到内存中.
+
+        Args:
+            local_filename (str): 本地文件的路径.
+            upload_path (str): 文件在网盘中的目标路径.
+            isdir (Literal[0, 1]): 是否为目录, 0 表示文件, 1 表示目录.
+            rtype (Literal[1, 2, 3]): 文件命名策略, 默认为 1.
+            max_workers (int): 最大并发分片数, 默认为 CPU 核数 - 1.
+            bs (Literal[4, 16, 32]): 分片大小, 单位为 MB. 默认为 None, 根据会员类型和文件大小自动选择.
+            show_progress (bool): 是否显示上传进度, 默认为 True.
+
+        Returns:
+            None | dict: 创建文件接口的返回值, 失败时返回 None
+        """
+        file_path = Path(local_filename)
+        file_stat = file_path.stat()
+        file_size = file_stat.st_size
+        block_size = choose_block_size(file_size, await self.get_vip_type(), bs)
+
+        # 计算 md5 会阻塞, 放到线程中执行; 只读取一次文件
+        hashes = await asyncio.to_thread(hash_file, file_path, block_size)
+        content_md5 = encrypt_md5(hashes.md5)
+        slice_md5 = hashes.slice_md5
+        block_list = hashes.block_list
+
+        res1 = await self.up.precreate(
+            path=upload_path,
+            size=file_size,
+            isdir=isdir,
+            block_list=block_list,
+            rtype=rtype,
+            content_md5=content_md5,
+            slice_md5=slice_md5,
+        )
+        if not res1 or res1.get("errno") != 0:
+            print(f"预创建失败: {res1}")
+            return None
+        uploadid = res1["uploadid"]
+        # 只上传云端缺少的分片; 秒传时不上传任何分片
+        todo = missing_blocks(res1, len(block_list))
+        server_url = ""
+        if not todo:
+            print("云端已有相同内容, 跳过上传分片")
+        else:
+            res2 = await self.up.locateupload(path=upload_path, uploadid=uploadid)
+            if not res2 or not res2.get("servers"):
+                print(f"获取上传地址失败: {res2}")
+                return None
+            server_url = res2["servers"][0]["server"]
+
+        m = os.cpu_count() or 1
+        max_workers = m - 1 if max_workers is None else max_workers
+        max_workers = max(1, min(max_workers, len(todo)))
+        semaphore = asyncio.Semaphore(max_workers)
+        uploaded = len(block_list) - len(todo)
+
+        def read_block(idx: int) -> bytes:
+            with file_path.open("rb") as f:
+                f.seek(idx * block_size)
+                return f.read(block_size)
+
+        async def worker(idx: int, expected_md5: str) -> int:
+            nonlocal uploaded
+            async with semaphore:
+                chunk = await asyncio.to_thread(read_block, idx)
+                await self.upload_part(
+                    server_url, upload_path, uploadid, idx, chunk, expected_md5
+                )
+            uploaded += 1
+            if show_progress:
+                percent = uploaded / len(block_list) * 100
+                print(f"\r上传进度: {percent:.2f}%", end="", flush=True)
+            return idx
+
+        tasks = [asyncio.create_task(worker(idx, block_list[idx])) for idx in todo]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            # 等取消的任务真正结束, 避免它们在返回后继续读文件、发请求
+            await asyncio.gather(*tasks, return_exceptions=True)
+            print(f"\n分片上传失败: {e}")
+            return None
+
+        res3 = await self.up.create(
+            path=str(upload_path),
+            size=str(file_size),
+            isdir="0" if isdir == 0 else "1",
+            block_list=json.dumps(block_list, separators=(",", ":")),
+            uploadid=str(uploadid),
+            rtype=rtype,
+            local_ctime=int(file_stat.st_ctime),
+            local_mtime=int(file_stat.st_mtime),  # 同步时据此判断文件是否修改过
+        )
+        print("\n✅ 所有分片上传完成")
+        return res3
+
+
+__all__ = [
+    "AsyncFile",
+    "AsyncUpload",
+    "AsyncUser",
+    "AsyncUploadFile",
+]
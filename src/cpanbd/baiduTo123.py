@@ -1,10 +1,9 @@
 from pathlib import PurePosixPath
 
-from cpan123 import Pan123openAPI  # type: ignore
 from pydantic import validate_call
 
-from cpanbd.file import File
 from cpanbd.utils.md5 import decrypt_md5
+from cpanbd.utils.resolver import get_resolver
 
 
 @validate_call
@@ -41,25 +40,17 @@ def baiduTo123(
     # 判断是文件而不是文件夹
     assert PurePosixPath(filebd).suffix != "", "❌ 百度网盘文件路径必须是文件"
     assert PurePosixPath(file123).suffix != "", "❌ 123网盘文件路径必须是文件"
-    bddir = str(PurePosixPath(filebd).parent)
-    bdname = str(PurePosixPath(filebd).name)
 
-    # p123dir = str(PurePosixPath(file123).parent)
-    # p123name = str(PurePosixPath(file123).name)
+    from cpan123 import Pan123openAPI  # type: ignore
 
-    file = File()
     pan123 = Pan123openAPI()
-    listFiles = file.search(key=bdname, dir=bddir, web=0)
-    if not listFiles or "list" not in listFiles:
+    # 按目录缓存文件列表, 同一目录下的多个文件只列一次目录
+    try:
+        fileinfo = get_resolver().resolve(filebd)
+    except ValueError:
         print("❌ 百度网盘搜索文件失败")
         return False
-
-    fileinfo = None
-    for item in listFiles["list"]:
-        if item["path"] == filebd and item["isdir"] == 0:
-            fileinfo = item
-            break
-    if not fileinfo:
+    if not fileinfo or fileinfo["isdir"] != 0:
         print("❌ 百度网盘文件不存在")
         return False
     filesize = fileinfo["size"]
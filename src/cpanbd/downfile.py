@@ -1,15 +1,17 @@
 import json
-import os
-from pathlib import Path, PurePosixPath
+from pathlib import Path
 
-from .file import File
+from .file import LISTALL_MAX_LIMIT, File
+from .utils.auth import get_auth
 from .utils.download import download_file
 from .utils.md5 import decrypt_md5
+from .utils.resolver import get_resolver
 
 
 class DownFile:
     def __init__(self):
         self.file = File()
+        self.resolver = get_resolver()  # 同一目录下的多个文件只列一次目录
 
     def downfile(
         self,
@@ -45,19 +47,12 @@ class DownFile:
         """
         assert filebd.startswith("/"), "百度网盘文件路径必须以 / 开头"
 
-        parent_dir = str(PurePosixPath(filebd).parent)
-
-        file_list_response = self.file.list_files(dir=parent_dir, web=0)
-
-        if not file_list_response or "list" not in file_list_response:
+        try:
+            fileinfo = self.resolver.resolve(filebd)
+        except ValueError:
             print("❌ 无法列出百度网盘文件, 请检查目录或网络. ")
             return
-        fileinfo = None
-        for item in file_list_response["list"]:
-            if item["path"] == filebd and item["isdir"] == 0:
-                fileinfo = item
-                break
-        if not fileinfo:
+        if not fileinfo or fileinfo["isdir"] != 0:
             print("百度网盘文件不存在")
             return
         fs_id = fileinfo["fs_id"]
@@ -71,9 +66,8 @@ class DownFile:
             print("❌ 无法获取文件元信息(dlink 和 md5)")
             return
         meta = meta_response["list"][0]
-        dlink = meta["dlink"] + "&access_token=" + os.getenv("BAIDU_ACCESS_TOKEN", "")
+        dlink = meta["dlink"] + "&access_token=" + (get_auth().token or "")
         md5 = decrypt_md5(meta["md5"])  # md5
-        dlink = dlink + "&access_token=" + os.getenv("BAIDU_ACCESS_TOKEN", "")
         if verbose:
             print(f"✅ 开始下载: {filebd}")
             print(f"➡️ 保存至: {output_path}")
@@ -111,60 +105,59 @@ class DownFile:
             ```
         """
         assert dirbd.startswith("/"), "百度网盘目录路径必须以 / 开头"
-        has_more = 0  # 是否还有下一页, 0表示无, 1表示有
-        cursor = 0  # 当还有下一页时, 为下一次查询的起点
-        files = []  # 存储文件信息
-        while True:
-            listall_response = self.file.listall(
-                path=dirbd, recursion=1, start=cursor, limit=10, web=0
-            )
-            if not listall_response or "list" not in listall_response:
-                print("❌ 无法列出百度网盘文件, 请检查目录或网络. ")
-                return
-            files.extend(listall_response["list"])
-            has_more = listall_response["has_more"]
-            if has_more == 1:
-                cursor = listall_response["cursor"]
-            else:
-                break
-        # 过滤掉目录,只保留文件
-        files = [file for file in files if file["isdir"] == 0]
-        if not files:
+        count = 0  # 已处理的文件数
+        with self.file.meta_loader(dlink=1) as loader:
+            # 边翻页边下载, 每页最多 1000 项, dlink 按 100 个 fs_id 一批查询
+            for files in self._iter_file_pages(dirbd):
+                if files is None:
+                    return  # 列目录失败, 已经打印过错误
+                if not files:
+                    continue
+                if verbose and count == 0:
+                    print(f"✅ 开始下载: {dirbd}")
+                    print(f"➡️ 保存至: {output_path}")
+                count += len(files)
+                meta_futures = loader.load_many(fileinfo["fs_id"] for fileinfo in files)
+                for fileinfo, meta_future in zip(files, meta_futures, strict=True):
+                    filebd = fileinfo["path"]
+                    meta = meta_future.result()
+                    if not meta:
+                        print(f"❌ 无法获取文件{filebd}的元信息(dlink 和 md5)")
+                        return
+
+                    dlink = meta["dlink"] + "&access_token=" + (get_auth().token or "")
+                    md5 = decrypt_md5(meta["md5"])
+
+                    temp = Path(filebd).relative_to(dirbd)
+                    output_file_path = Path(output_path) / temp
+                    Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
+                    download_file(
+                        url=dlink,
+                        output_path=output_file_path,
+                        headers={"User-Agent": "pan.baidu.com"},
+                        overwrite=overwrite,
+                        verbose=verbose,
+                        expected_md5=md5,
+                    )
+
+        if count == 0:
             print("❌ 目录下没有文件")
+
+    def _iter_file_pages(self, dirbd: str):
+        """按页返回目录下(含递归)的文件, 过滤掉目录; 获取失败时返回 None 后结束"""
+        page: list = []
+        try:
+            for item in self.file.iter_listall(dirbd, recursion=1, web=0):
+                if item["isdir"] == 0:
+                    page.append(item)
+                if len(page) >= LISTALL_MAX_LIMIT:
+                    yield page
+                    page = []
+        except ValueError:
+            print("❌ 无法列出百度网盘文件, 请检查目录或网络. ")
+            yield None
             return
-        if verbose:
-            print(f"✅ 开始下载: {dirbd}")
-            print(f"➡️ 保存至: {output_path}")
-        for fileinfo in files:
-            filebd = fileinfo["path"]
-            fs_id = fileinfo["fs_id"]
-            fsids_json = json.dumps([fs_id])
-            meta_response = self.file.filemetas(fsids=fsids_json, dlink=1)
-            if (
-                not meta_response
-                or "list" not in meta_response
-                or not meta_response["list"]
-            ):
-                print(f"❌ 无法获取文件{filebd}的元信息(dlink 和 md5)")
-                return
-
-            meta = meta_response["list"][0]
-            dlink = (
-                meta["dlink"] + "&access_token=" + os.getenv("BAIDU_ACCESS_TOKEN", "")
-            )
-            md5 = decrypt_md5(meta["md5"])
-
-            temp = Path(filebd).relative_to(dirbd)
-            output_file_path = Path(output_path) / temp
-            Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
-            download_file(
-                url=dlink,
-                output_path=output_file_path,
-                headers={"User-Agent": "pan.baidu.com"},
-                overwrite=overwrite,
-                verbose=verbose,
-                expected_md5=md5,
-            )
+        yield page
 
 
 if __name__ == "__main__":
@@ -1,12 +1,76 @@
-from typing import Any, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional
 
 from .utils.api import Auth
 from .utils.baseapiclient import BaseApiClient, auto_args_call_api
+from .utils.bulk import BulkFileManager
+from .utils.loader import FilemetasLoader
+from .utils.pager import iter_pages
+from .utils.search import search_many
+from .utils.table import FileTable
+from .utils.validation import ValidationMode, ValidationPolicy
+from .utils.walker import LIST_FILES_MAX_LIMIT, WalkItem, walk
+from .utils.watch import RemoteWatcher
+
+LISTALL_MAX_LIMIT = 1000  # listall 接口 limit 的上限
+PAGE_MAX_NUM = 1000  # doclist/imagelist/videolist/btlist 每页建议的最大数量
 
 
 class File(BaseApiClient):
-    def __init__(self, auth: Optional[Auth] = None) -> None:
-        super().__init__(filepath="file", auth=auth)
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+    ) -> None:
+        super().__init__(filepath="file", auth=auth, validation=validation)
+
+    def meta_loader(self, dlink: int = 1, **kwargs: Any) -> FilemetasLoader:
+        """批量查询文件信息
+
+        按单个 fs_id 查询, 自动合并成每次 100 个 fs_id 的 `filemetas` 请求.
+
+        Args:
+            dlink (int): 是否需要下载地址, 0为否, 1为是, 默认为1
+            **kwargs: 其他 `filemetas` 参数, 以及 `FilemetasLoader` 的参数(batch_size, wait, max_workers, cache)
+
+        Example:
+            ```python
+            file = File()
+            with file.meta_loader(dlink=1) as loader:
+                futures = loader.load_many(fs_ids)
+            metas = [f.result() for f in futures]
+            ```
+        """
+        return FilemetasLoader(self, dlink=dlink, **kwargs)
+
+    def walk(
+        self,
+        top: str = "/",
+        max_workers: int = 8,
+        page_size: int = LIST_FILES_MAX_LIMIT,
+        onerror: Optional[Callable[[str, Exception], None]] = None,
+        **kwargs: Any,
+    ) -> Iterator[WalkItem]:
+        """并发遍历目录, 类似 `os.walk`, 返回 `(dirpath, dirs, files)`
+
+        基于 `list_files` 按广度优先并发列目录, 目录多而宽时比 `listall(recursion=1)` 快.
+        详见 `cpanbd.utils.walker.walk`.
+
+        Args:
+            top (str): 起始目录, 必须/开头
+            max_workers (int): 最大并发数, 默认为8
+            page_size (int): 每页数量, 最大1000, 默认为1000
+            onerror (Callable): 列目录失败时的回调 `onerror(path, exception)`, 为 None 时直接抛出异常
+            **kwargs: 其他 `list_files` 参数
+
+        Example:
+            ```python
+            file = File()
+            for dirpath, dirs, files in file.walk("/我的资源"):
+                print(dirpath, len(dirs), len(files))
+            ```
+        """
+        return walk(self, top, max_workers, page_size, onerror, **kwargs)
 
     @auto_args_call_api()
     def list_files(
@@ -81,6 +145,212 @@ class File(BaseApiClient):
         其他参数请参考API文档
         """
 
+    def iter_listall(
+        self,
+        path: str = "/",
+        recursion: int = 1,
+        page_size: int = LISTALL_MAX_LIMIT,
+        prefetch: bool = True,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐页遍历 `listall` 的结果
+
+        按 `has_more`/`cursor` 翻页, 每收到一页就逐项返回, 不会把整个目录树保存在内存中.
+        开启 `prefetch` 时, 调用方处理当前页的同时, 后台线程已经开始请求下一页.
+
+        Args:
+            path (str): 目录名称绝对路径, 必须/开头
+            recursion (int): 是否递归, 0为否, 1为是, 默认为1
+            page_size (int): 每页数量, 最大1000, 默认为1000
+            prefetch (bool): 是否预取下一页, 默认为True
+            **kwargs: 其他 `listall` 参数, 如 order, desc, ctime, mtime, web;
+                `start` 作为起始位置, `limit` 等同于 page_size
+
+        Yields:
+            dict: 文件信息, 与 `listall` 返回的 list 中的每一项相同
+
+        Raises:
+            ValueError: 获取文件列表失败
+
+        Example:
+            ```python
+            file = File()
+            for item in file.iter_listall("/我的资源", recursion=1):
+                print(item["path"])
+            ```
+        """
+        start = int(kwargs.pop("start", 0) or 0)
+        limit = max(1, min(int(kwargs.pop("limit", page_size)), LISTALL_MAX_LIMIT))
+
+        def fetch(cursor: int) -> dict[str, Any]:
+            res = self.listall(
+                path=path, recursion=recursion, start=cursor, limit=limit, **kwargs
+            )
+            if not res or "list" not in res:
+                raise ValueError(f"❌ 获取文件列表失败: {path}, {res}")
+            return res
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            res = fetch(start)
+            while True:
+                following = None
+                if res.get("has_more") == 1:
+                    if executor is not None:
+                        following = executor.submit(fetch, res["cursor"])
+                    else:
+                        following = res["cursor"]
+                yield from res["list"]
+                if following is None:
+                    return
+                if executor is not None:
+                    res = following.result()
+                else:
+                    res = fetch(following)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def listall_table(
+        self, path: str = "/", recursion: int = 1, **kwargs: Any
+    ) -> FileTable:
+        """递归获取文件列表, 结果按列保存为 `FileTable`, 适合上百万项的目录树
+
+        Args:
+            path (str): 目录名称绝对路径, 必须/开头
+            recursion (int): 是否递归, 0为否, 1为是, 默认为1
+            **kwargs: 其他 `iter_listall` 参数
+
+        Example:
+            ```python
+            file = File()
+            table = file.listall_table("/")
+            print(len(table), table[0]["path"])
+            ```
+        """
+        return FileTable.from_items(self.iter_listall(path, recursion, **kwargs))
+
+    def _iter_category_pages(
+        self, api: str, parent_path: str, num: int, depth: int, **kwargs: Any
+    ) -> Iterator[dict[str, Any]]:
+        """按 page/num 分页的分类接口, 并发预取后面的页"""
+        num = max(1, min(num, PAGE_MAX_NUM))
+        method = getattr(self, api)
+
+        def fetch(page: int) -> tuple[list, bool]:
+            res = method(parent_path=parent_path, page=page, num=num, **kwargs)
+            if not res or "info" not in res:
+                raise ValueError(f"❌ 获取{api}失败: {parent_path}, {res}")
+            return res["info"], len(res["info"]) < num
+
+        for items in iter_pages(fetch, first=1, step=1, depth=depth):
+            yield from items
+
+    def iter_doclist(
+        self,
+        parent_path: str = "/",
+        num: int = PAGE_MAX_NUM,
+        depth: int = 4,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐项返回 `doclist` 的所有结果, 同时预取后面 depth 页
+
+        Args:
+            parent_path (str): 目录名称绝对路径, 必须/开头
+            num (int): 每页数量, 最大1000
+            depth (int): 预取深度, 为1时逐页请求
+            **kwargs: 其他 `doclist` 参数, 如 order, desc, recursion, web
+        """
+        return self._iter_category_pages("doclist", parent_path, num, depth, **kwargs)
+
+    def iter_imagelist(
+        self,
+        parent_path: str = "/",
+        num: int = PAGE_MAX_NUM,
+        depth: int = 4,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐项返回 `imagelist` 的所有结果, 参数同 `iter_doclist`"""
+        return self._iter_category_pages("imagelist", parent_path, num, depth, **kwargs)
+
+    def iter_videolist(
+        self,
+        parent_path: str = "/",
+        num: int = PAGE_MAX_NUM,
+        depth: int = 4,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐项返回 `videolist` 的所有结果, 参数同 `iter_doclist`"""
+        return self._iter_category_pages("videolist", parent_path, num, depth, **kwargs)
+
+    def iter_btlist(
+        self,
+        parent_path: str = "/",
+        num: int = PAGE_MAX_NUM,
+        depth: int = 4,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐项返回 `btlist` 的所有结果, 参数同 `iter_doclist`"""
+        return self._iter_category_pages("btlist", parent_path, num, depth, **kwargs)
+
+    def iter_categorylist(
+        self,
+        category: str = "1",
+        parent_path: str = "/",
+        limit: int = LISTALL_MAX_LIMIT,
+        depth: int = 4,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """逐项返回 `categorylist` 的所有结果, 按 start/limit 分页, 同时预取后面 depth 页
+
+        Args:
+            category (str): 文件类型, 1 视频、2 音频、3 图片、4 文档、5 应用、6 其他、7 种子, 多个用英文逗号分隔
+            parent_path (str): 目录名称绝对路径, 必须/开头
+            limit (int): 每页数量, 最大1000
+            depth (int): 预取深度, 为1时逐页请求
+            **kwargs: 其他 `categorylist` 参数, 如 recursion, ext, order, desc
+
+        Example:
+            ```python
+            file = File()
+            for item in file.iter_categorylist(category="3", recursion=1, depth=8):
+                print(item["path"])
+            ```
+        """
+        limit = max(1, min(limit, LISTALL_MAX_LIMIT))
+
+        def fetch(start: int) -> tuple[list, bool]:
+            res = self.categorylist(
+                category=category,
+                parent_path=parent_path,
+                start=start,
+                limit=limit,
+                **kwargs,
+            )
+            if not res or "list" not in res:
+                raise ValueError(f"❌ 获取categorylist失败: {parent_path}, {res}")
+            items = res["list"]
+            return items, len(items) < limit or res.get("has_more") == 0
+
+        for items in iter_pages(fetch, first=0, step=limit, depth=depth):
+            yield from items
+
+    def watch(self, path: str = "/", **kwargs: Any) -> RemoteWatcher:
+        """监视目录中新上传和修改的文件, 每次轮询只请求增量
+
+        Args:
+            path (str): 监视的目录, 必须/开头
+            **kwargs: `RemoteWatcher` 的参数, 如 interval, max_interval, backoff, since
+
+        Example:
+            ```python
+            file = File()
+            for event in file.watch("/apps/xxx/inbox", interval=30):
+                print(event.kind, event.path)
+            ```
+        """
+        return RemoteWatcher(self, path, **kwargs)
+
     @auto_args_call_api()
     def doclist(
         self,
@@ -268,6 +538,7 @@ class File(BaseApiClient):
         web: int = 0,
         device_id: Optional[str] = None,
         skip=False,
+        page: Optional[int] = None,
     ) -> dict[str, Any] | None:
         """搜索文件
 
@@ -284,11 +555,42 @@ class File(BaseApiClient):
             web (int): 是否web模式, 默认为0,  为1时返回缩略图地址
             device_id (str): 设备ID, 硬件设备必传
             skip (bool): 是否跳过检查, 默认为False
+            page (int): 页数, 从1开始, 缺省则返回所有条目 (返回 has_more=1 时可以继续请求下一页)
 
         其他参数请参考API文档
 
         """
 
+    def search_many(
+        self,
+        keys: str | Iterable[str],
+        dirs: str | Iterable[str] = "/",
+        recursion: int = 1,
+        category: Optional[int] = None,
+        max_workers: int = 8,
+        **kwargs: Any,
+    ) -> Iterator[dict[str, Any]]:
+        """并发搜索多个关键字、多个目录, 自动翻页, 按 fs_id 去重, 边搜索边返回
+
+        详见 `cpanbd.utils.search.search_many`.
+
+        Args:
+            keys (str | Iterable[str]): 一个或多个关键字
+            dirs (str | Iterable[str]): 一个或多个目录, 必须/开头, 默认为 /
+            recursion (int): 是否递归, 默认为1
+            category (int): 文件类型, 为 None 时不限类型
+            max_workers (int): 最大并发数, 默认为8
+            **kwargs: 其他参数, 如 max_pages, web
+
+        Example:
+            ```python
+            file = File()
+            for item in file.search_many(["a.pdf", "b.pdf"], ["/书籍", "/资料"]):
+                print(item["path"])
+            ```
+        """
+        return search_many(self, keys, dirs, recursion, category, max_workers, **kwargs)
+
     @auto_args_call_api
     def filemetas(
         self,
@@ -328,7 +630,7 @@ class File(BaseApiClient):
     def filemanager(
         self,
         opera: Literal["copy", "move", "rename", "delete"],
-        filelist: list[dict[str, Any]],
+        filelist: str | list[dict[str, Any]] | list[str],
         aasync: Literal[0, 1, 2] = 1,
         ondup: Literal["fail", "newcopy", "overwrite", "skip"] = "fail",
         device_id: Optional[str] = None,
@@ -343,7 +645,7 @@ class File(BaseApiClient):
         Args:
             opera (str): 文件操作参数, 可实现文件复制、移动、重命名、删除, 依次对应的参数值为: copy, move, rename, delete
             aasync (int): 0 同步, 1 自适应, 2 异步
-            filelist (list[dict]): 文件操作列表, 数组中元素是object类型, 数组大小上限是:100
+            filelist (str | list[dict]): 文件操作列表, 数组中元素是object类型, 数组大小上限是:100 (超过100个请使用 `bulk`)
             ondup (str): 全局ondup,遇到重复文件的处理策略, fail(默认, 直接返回失败)、newcopy(重命名文件)、overwrite、skip
             device_id (str): 设备ID, 硬件设备必传
             skip (bool): 是否跳过检查, 默认为False
@@ -360,3 +662,43 @@ class File(BaseApiClient):
             ```
 
         """
+
+    @auto_args_call_api()
+    def taskquery(
+        self,
+        taskid: int,
+        skip=False,
+    ) -> dict[str, Any] | None:
+        """查询异步任务的状态
+
+        `filemanager` 异步执行(aasync=2, 或 aasync=1 时服务端选择了异步)时会返回 taskid, 通过本接口查询任务进度.
+
+        !!! note "注意"
+            开放平台文档中没有此接口, 这里使用的是网页版的 `/share/taskquery`
+
+        Args:
+            taskid (int): `filemanager` 返回的 taskid
+            skip (bool): 是否跳过检查, 默认为False
+
+        Returns:
+            dict: status 为 pending/running/success/failed, 失败时 task_errno 为错误码
+        """
+
+    def bulk(self, **kwargs: Any) -> BulkFileManager:
+        """批量管理文件 (复制、移动、重命名、删除), 不限数量
+
+        自动按 100 个一批拆分, 多批并发提交, 等待异步任务完成, 返回每一项的结果.
+
+        Args:
+            **kwargs: `BulkFileManager` 的参数, 如 max_inflight, ondup, poll_timeout
+
+        Example:
+            ```python
+            file = File()
+            results = file.bulk(ondup="skip").move(
+                [{"path": f"/a/{i}.txt", "dest": "/b", "newname": f"{i}.txt"} for i in range(1000)]
+            )
+            failed = [r for r in results if not r.ok]
+            ```
+        """
+        return BulkFileManager(self, **kwargs)
@@ -2,11 +2,16 @@ from typing import Any, Literal, Optional
 
 from .utils.api import Auth
 from .utils.baseapiclient import BaseApiClient, auto_args_call_api
+from .utils.validation import ValidationMode, ValidationPolicy
 
 
 class Upload(BaseApiClient):
-    def __init__(self, auth: Optional[Auth] = None) -> None:
-        super().__init__(filepath="upload", auth=auth)
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+    ) -> None:
+        super().__init__(filepath="upload", auth=auth, validation=validation)
 
     @auto_args_call_api()
     def precreate(
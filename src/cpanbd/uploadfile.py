@@ -1,19 +1,123 @@
 import json
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from threading import Lock
+from threading import BoundedSemaphore, Event, Lock
 from typing import Literal, Optional
 
+import requests
 from pydantic import validate_call
+from tenacity import RetryError
 
 from .upload import Upload
-from .utils.md5 import (
-    calculate_md5,
-    calculate_slice_md5,
-    encrypt_md5,
-    get_file_md5_blocks,
-)
+from .user import User
+from .utils.journal import JournalWriter, UploadJournal, journal_path
+from .utils.md5 import encrypt_md5, hash_file
+
+# 各会员类型 (uinfo 的 vip_type: 0 普通用户, 1 普通会员, 2 超级会员) 允许的最大分片大小, 单位 MB
+VIP_BLOCK_SIZES: dict[int, Literal[4, 16, 32]] = {0: 4, 1: 16, 2: 32}
+MAX_BLOCKS = 10000  # 单个文件最多的分片数
+
+
+def choose_block_size(
+    file_size: int, vip_type: int = 0, bs: Optional[Literal[4, 16, 32]] = None
+) -> int:
+    """根据会员类型和文件大小选择分片大小
+
+    未指定 bs 时使用会员允许的最大分片, 分片数最少; 文件比最大分片小时, 选能装下整个文件的最小分片,
+    减少读取时占用的内存. 指定的 bs 超过会员允许的大小时, 降为允许的最大值.
+
+    Args:
+        file_size (int): 文件大小, 单位 B
+        vip_type (int): 会员类型, 0 普通用户, 1 普通会员, 2 超级会员
+        bs (Literal[4, 16, 32]): 指定的分片大小, 单位 MB
+
+    Returns:
+        int: 分片大小, 单位 B
+    """
+    limit = VIP_BLOCK_SIZES.get(vip_type, VIP_BLOCK_SIZES[0])
+    if bs is None:
+        allowed = [mb for mb in sorted(set(VIP_BLOCK_SIZES.values())) if mb <= limit]
+        mb = next((mb for mb in allowed if mb * 1024 * 1024 >= file_size), limit)
+    elif bs > limit:
+        print(f"⚠️ 会员类型 {vip_type} 的分片最大为 {limit}MB, 忽略 bs={bs}")
+        mb = limit
+    else:
+        mb = bs
+    block_size = mb * 1024 * 1024
+    if -(-file_size // block_size) > MAX_BLOCKS:
+        print(f"⚠️ 分片数超过 {MAX_BLOCKS}, 文件可能无法上传: {file_size} B")
+    return block_size
+
+
+# 获取会员类型时 API 层会抛出的异常: 重试耗尽、响应解析/校验失败、请求异常
+UINFO_ERRORS = (RetryError, ValueError, requests.RequestException)
+
+
+def vip_type_from_uinfo(res: Optional[dict]) -> int:
+    """从 `User.uinfo` 的返回值取出会员类型, 缺失或不认识时按普通用户 (0) 处理"""
+    try:
+        vip_type = int((res or {}).get("vip_type") or 0)
+    except (TypeError, ValueError):
+        return 0
+    return vip_type if vip_type in VIP_BLOCK_SIZES else 0
+
+
+def uinfo_failed(error: BaseException) -> int:
+    """获取会员类型失败时提示并按普通用户处理"""
+    print(f"⚠️ 获取会员类型失败, 按普通用户处理: {error}")
+    return 0
+
+
+def missing_blocks(res: dict, count: int) -> list[int]:
+    """根据预创建的返回值, 计算还需要上传的分片序号
+
+    只有 return_type 为 2 时才认为云端已有相同内容 (秒传), 不需要上传任何分片; 否则 block_list 为
+    云端还缺少的分片序号. block_list 为空、缺失或无法解析时, 上传全部分片.
+
+    Args:
+        res (dict): `Upload.precreate` 的返回值
+        count (int): 分片总数
+
+    Returns:
+        list[int]: 需要上传的分片序号, 从小到大
+    """
+    if res.get("return_type") == 2:
+        return []
+    everything = list(range(count))
+    needed = res.get("block_list")
+    if not isinstance(needed, list) or not needed:
+        return everything
+    try:
+        indices = {int(i) for i in needed}
+    except (TypeError, ValueError):
+        return everything
+    return sorted(i for i in indices if 0 <= i < count) or everything
+
+
+class PartUploadError(Exception):
+    """superfile2 的返回中没有分片 md5, res 为接口返回值"""
+
+    def __init__(self, message: str, res: Optional[dict] = None) -> None:
+        super().__init__(message)
+        self.res = res or {}
+
+
+def session_rejected(error: BaseException) -> bool:
+    """分片上传失败是否因为服务端拒绝了 uploadid (会话失效), 而不是网络等临时错误
+
+    - superfile2 返回了 error_code 或非 0 的 errno
+    - 重试耗尽后最后一次是 4xx 响应 (429 限流除外)
+    """
+    if isinstance(error, RetryError):
+        error = error.last_attempt.exception() or error
+    if isinstance(error, PartUploadError):
+        return bool(error.res.get("error_code") or error.res.get("errno"))
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return 400 <= status < 500 and status != 429
+    return False
 
 
 class UploadFile:
@@ -44,6 +148,16 @@ class UploadFile:
 
     def __init__(self):
         self.up = Upload()
+        self._vip_type: Optional[int] = None
+
+    def get_vip_type(self) -> int:
+        """当前账号的会员类型, 只请求一次. 获取失败时按普通用户处理"""
+        if self._vip_type is None:
+            try:
+                self._vip_type = vip_type_from_uinfo(User(auth=self.up.auth).uinfo())
+            except UINFO_ERRORS as e:
+                self._vip_type = uinfo_failed(e)
+        return self._vip_type
 
     def upload_part(
         self,
@@ -84,13 +198,13 @@ class UploadFile:
             files=files,
         )
         if not res or not res.get("md5"):
-            raise Exception(f"上传分片失败: {res}")
+            raise PartUploadError(f"上传分片失败: {res}", res)
         if res["md5"] != expected_md5:
             raise Exception(
                 f"分片 {idx} 的 MD5 不一致: 预期 {expected_md5}, 实际 {res['md5']}"
             )
 
-        if progress["lock"]:
+        with progress["lock"]:
             progress["uploaded"] += 1
             if show_progress:
                 percent = (progress["uploaded"] / progress["total"]) * 100
@@ -105,8 +219,11 @@ class UploadFile:
         isdir: Literal[0, 1] = 0,
         rtype: Literal[1, 2, 3] = 1,
         max_workers: Optional[int] = None,
-        bs: Literal[4, 16, 32] = 4,
+        bs: Optional[Literal[4, 16, 32]] = None,
         show_progress: bool = True,
+        prefetch: int = 2,
+        resume: bool = True,
+        state_dir: Optional[str] = None,
     ) -> None | dict:
         """
         使用多线程方式将本地文件上传到百度网盘.
@@ -119,62 +236,148 @@ class UploadFile:
                 1: 当path冲突时, 进行重命名
                 2: 当path冲突且block_list不同时, 进行重命名
                 3: 当云端存在同名文件时, 对该文件进行覆盖
-            bs (Literal[4, 16, 32]): 分片大小, 单位为 MB, 默认为 4MB.
+            bs (Literal[4, 16, 32]): 分片大小, 单位为 MB. 默认为 None, 根据会员类型和文件大小自动选择
+                (普通用户 4MB, 普通会员 16MB, 超级会员 32MB), 超过会员允许的大小时会被降低.
             max_workers (int): 最大并发线程数, 默认为 4.
             show_progress (bool): 是否显示上传进度, 默认为 True.
+            prefetch (int): 除正在上传的分片外, 最多提前读取到内存中的分片数, 默认为 2.
+                内存中同时最多有 max_workers + prefetch 个分片.
+            resume (bool): 是否记录上传进度并断点续传, 默认为 True.
+                中断后再次上传同一个文件时, 只上传还没完成的分片, 详见 `utils.journal`.
+            state_dir (str): 保存上传记录的目录, 默认为 None, 保存在本地文件旁边 (`<文件名>.bdupload.json`).
 
         Returns:
             None
         """
-        block_size = 4 * 1024 * 1024  # 4MB
-
-        file_path = Path(local_filename)
-        file_size = file_path.stat().st_size
-
-        content_md5 = encrypt_md5(calculate_md5(file_path))
-        slice_md5 = calculate_slice_md5(file_path)
-        block_list = get_file_md5_blocks(file_path, block_size=block_size)
-
-        # 预创建文件
-        res1 = self.up.precreate(
-            path=upload_path,
-            size=file_size,
+        retry_kwargs = dict(
+            local_filename=local_filename,
+            upload_path=upload_path,
             isdir=isdir,
-            block_list=block_list,
             rtype=rtype,
-            content_md5=content_md5,
-            slice_md5=slice_md5,
-        )
-        if not res1 or res1.get("errno") != 0:
-            print(f"预创建失败: {res1}")
-            return
-        uploadid = res1["uploadid"]
-        # 获取上传地址
-        res2 = self.up.locateupload(
-            path=upload_path,
-            uploadid=uploadid,
+            max_workers=max_workers,
+            bs=bs,
+            show_progress=show_progress,
+            prefetch=prefetch,
+            resume=resume,
+            state_dir=state_dir,
         )
+        file_path = Path(local_filename)
+        file_stat = file_path.stat()
+        file_size = file_stat.st_size
+        block_size = choose_block_size(file_size, self.get_vip_type(), bs)
 
-        if not res2 or not res2.get("servers"):
-            print(f"获取上传地址失败: {res2}")
-            return
-        server_url = res2["servers"][0]["server"]
+        jpath = journal_path(file_path, state_dir) if resume else None
+        journal = UploadJournal.load(jpath) if jpath is not None else None
+        resumed = False
+        if journal is not None and not journal.matches(
+            upload_path, file_size, file_stat.st_mtime_ns, block_size
+        ):
+            journal = None
+        if journal is not None:
+            # 上传服务器可能变化, 重新获取; 失败时重新预创建
+            res2 = self.up.locateupload(path=upload_path, uploadid=journal.uploadid)
+            if res2 and res2.get("servers"):
+                journal.server = res2["servers"][0]["server"]
+                resumed = True
+                print(
+                    f"继续上传, 已完成 {len(journal.done)}/{len(journal.block_list)} 个分片"
+                )
+            else:
+                journal = None
+
+        if journal is None:
+            # 读取一次文件, 同时计算整个文件、校验段和每个分片的 md5
+            hashes = hash_file(file_path, block_size=block_size)
+            journal = UploadJournal(
+                upload_path=upload_path,
+                size=file_size,
+                mtime_ns=file_stat.st_mtime_ns,
+                block_size=block_size,
+                content_md5=encrypt_md5(hashes.md5),
+                slice_md5=hashes.slice_md5,
+                block_list=hashes.block_list,
+            )
+            # 预创建文件
+            res1 = self.up.precreate(
+                path=upload_path,
+                size=file_size,
+                isdir=isdir,
+                block_list=journal.block_list,
+                rtype=rtype,
+                content_md5=journal.content_md5,
+                slice_md5=journal.slice_md5,
+            )
+            if not res1 or res1.get("errno") != 0:
+                print(f"预创建失败: {res1}")
+                return
+            journal.uploadid = res1["uploadid"]
+            journal.created_at = time.time()
+            # 云端已有的分片不用再上传, 直接记为已完成
+            needed = set(missing_blocks(res1, len(journal.block_list)))
+            journal.done = [
+                i for i in range(len(journal.block_list)) if i not in needed
+            ]
+            if not needed:
+                print("云端已有相同内容, 跳过上传分片")
+            else:
+                # 获取上传地址
+                res2 = self.up.locateupload(
+                    path=upload_path,
+                    uploadid=journal.uploadid,
+                )
+
+                if not res2 or not res2.get("servers"):
+                    print(f"获取上传地址失败: {res2}")
+                    return
+                journal.server = res2["servers"][0]["server"]
+
+        uploadid = journal.uploadid
+        server_url = journal.server
+        block_list = journal.block_list
+        writer = JournalWriter(journal, jpath)
+        writer.flush()
+        done = set(journal.done)
+        todo = [i for i in range(len(block_list)) if i not in done]
 
         # 多线程上传分片
         # 计算可用的线程数
         m = os.cpu_count() or 1
         max_workers = m - 1 if max_workers is None else max_workers
-        max_workers = min(max_workers, len(block_list))
+        max_workers = max(1, min(max_workers, len(todo)))
         # print(f"开始多线程上传分片, 线程数: {max_workers}")
-        progress: dict = {"uploaded": 0, "total": len(block_list), "lock": Lock()}
-        with file_path.open("rb") as f:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = []
-                for idx, expected_md5 in enumerate(block_list):
-                    f.seek(idx * block_size)
-                    chunk = f.read(block_size)
+        progress: dict = {
+            "uploaded": len(block_list) - len(todo),
+            "total": len(block_list),
+            "lock": Lock(),
+        }
+        # 有空闲的位置时才读取下一个分片, 避免大文件整个被读到内存中
+        slots = BoundedSemaphore(max_workers + max(0, prefetch))
+        failed = Event()
+        succeeded = 0  # 这一次成功上传的分片数
+
+        def on_done(future: Future) -> None:
+            nonlocal succeeded
+            if future.cancelled() or future.exception() is not None:
+                failed.set()
+            else:
+                writer.mark_done(future.result())
+                with progress["lock"]:
+                    succeeded += 1
+            slots.release()
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = []
+        errors: list[BaseException] = []  # 失败分片的异常
+        try:
+            with file_path.open("rb") as f:
+                for idx in todo:
+                    slots.acquire()
+                    if not failed.is_set():
+                        f.seek(idx * block_size)
+                    chunk = b"" if failed.is_set() else f.read(block_size)
                     if not chunk:
-                        break  # 文件读取完毕
+                        slots.release()
+                        break  # 文件读取完毕或已有分片失败
                     future = executor.submit(
                         self.upload_part,
                         server_url,
@@ -182,18 +385,35 @@ class UploadFile:
                         uploadid,
                         idx,
                         chunk,
-                        expected_md5,
+                        block_list[idx],
                         progress,
                         show_progress,
                     )
+                    del chunk
+                    future.add_done_callback(on_done)
                     futures.append(future)
 
-                for future in as_completed(futures):
-                    try:
-                        idx = future.result()
-                    except Exception as e:
-                        print(f"\n分片上传失败: {e}")
-                        return
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    failed.set()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            writer.flush()
+        if failed.is_set():
+            print(f"\n分片上传失败: {errors[0] if errors else '已取消'}")
+            if errors and succeeded == 0 and all(map(session_rejected, errors)):
+                # 服务端已经不认这个 uploadid, 保留记录只会反复重试, 删除后重新预创建
+                writer.remove()
+                if resumed:
+                    print("uploadid 已失效, 重新预创建")
+                    return self.upload_file(**retry_kwargs)
+                return
+            if jpath is not None:
+                print(f"已保存上传进度, 再次上传同一个文件时继续: {jpath}")
+            return
 
         # 创建文件
         res3 = self.up.create(
@@ -203,6 +423,13 @@ class UploadFile:
             block_list=json.dumps(block_list, separators=(",", ":")),
             uploadid=str(uploadid),
             rtype=rtype,
+            local_ctime=int(file_stat.st_ctime),
+            local_mtime=int(file_stat.st_mtime),  # 同步时据此判断文件是否修改过
         )
+        # 创建成功后上传记录没用了; 创建失败说明 uploadid 已失效, 下次重新预创建
+        writer.remove()
+        if not res3 or res3.get("errno") != 0:
+            print(f"\n创建文件失败: {res3}")
+            return res3
         print("\n✅ 所有分片上传完成")
         return res3
@@ -2,11 +2,16 @@ from typing import Any, Literal, Optional
 
 from .utils.api import Auth
 from .utils.baseapiclient import BaseApiClient, auto_args_call_api
+from .utils.validation import ValidationMode, ValidationPolicy
 
 
 class User(BaseApiClient):
-    def __init__(self, auth: Optional[Auth] = None) -> None:
-        super().__init__(filepath="user", auth=auth)
+    def __init__(
+        self,
+        auth: Optional[Auth] = None,
+        validation: ValidationPolicy | ValidationMode | None = None,
+    ) -> None:
+        super().__init__(filepath="user", auth=auth, validation=validation)
 
     @auto_args_call_api()
     def uinfo(self, skip: bool = False) -> dict[str, Any] | None:
@@ -1,25 +1,90 @@
+import asyncio
+import copy
+import hashlib
 import importlib.resources as pkg_resources
+import json
+import os
 import sys
-import time
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional, Union
 
-import json5
 import requests
-from jsonpath import jsonpath
-from jsonschema import validate
 from pydantic import Field, TypeAdapter, dataclasses
 
-from .auth import Auth
+from .auth import Auth, get_auth
 from .checkdata import BaseResponse, JsonInput
 from .const import BASE_URL, HEADERS, TEMPLATE_PATTERN
+from .ratelimit import classify_url, get_limiter
+from .session import get_async_client, get_session
+from .validation import (
+    ValidationPolicy,
+    current_policy,
+    get_response_checker,
+    validate_schema,
+)
+
+API_CACHE_VERSION = 1  # apijson 的格式或 JsonInput 变化时递增, 使旧的磁盘缓存失效
+
+
+def _cache_file(path: Path, stat: os.stat_result) -> Optional[Path]:
+    """apijson 预校验结果的磁盘缓存位置, 只有设置了 `CPANBD_CACHE_DIR` 时才缓存"""
+    cache_dir = os.getenv("CPANBD_CACHE_DIR")
+    if not cache_dir:
+        return None
+    key = f"{API_CACHE_VERSION}:{path}:{stat.st_mtime_ns}:{stat.st_size}"
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"{path.stem}.{digest}.json"
+
+
+@lru_cache(maxsize=None)
+def _load_api_file(path: Path) -> dict:
+    """读取并校验 apijson 文件, 每个进程每个文件只读取一次
+
+    设置了环境变量 `CPANBD_CACHE_DIR` 时, 校验通过的内容以普通 JSON 的形式缓存到该目录,
+    文件未修改时直接读取缓存, 不再经过 json5 解析和 pydantic 校验 (跨进程加速启动).
+    """
+    stat = path.stat()
+    cache = _cache_file(path, stat)
+    if cache is not None and cache.exists():
+        try:
+            with open(cache, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            pass  # 缓存损坏, 重新解析
+
+    import json5
+
+    with open(path, "r", encoding="utf-8") as file:
+        try:
+            data: dict = json5.load(file)
+        except Exception as e:
+            print(f"❌ JSON 解析失败: {path}\n错误: {e}")
+            sys.exit(1)
+
+    # 校验 JSON 数据
+    list_adapter = TypeAdapter(Dict[str, JsonInput])
+    list_adapter.validate_python(data)
+
+    if cache is not None:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp, cache)
+        except OSError:
+            pass  # 缓存只是加速, 写不进去也不影响使用
+    return data
 
 
 def get_api(filepath: str, *args: Any) -> dict:
     """
     获取 API.
 
+    同一个文件在进程内只解析、校验一次, 返回的是副本, 可以随意修改.
+
     Args:
         filepath (str): API 所属分类,即 `apijson/***.json`下的文件名(不含后缀名)
         *args (Any): 预留的可选参数(当前未使用).
@@ -46,17 +111,7 @@ def get_api(filepath: str, *args: Any) -> dict:
         print(f"❌ 文件不存在: {path}")
         sys.exit(1)
 
-    # 读取并校验 JSON 文件
-    with open(path, "r", encoding="utf-8") as file:
-        try:
-            data: dict = json5.load(file)
-        except Exception as e:
-            print(f"❌ JSON 解析失败: {path}\n错误: {e}")
-            sys.exit(1)
-
-    # 校验 JSON 数据
-    list_adapter = TypeAdapter(Dict[str, JsonInput])
-    list_adapter.validate_python(data)
+    data = _load_api_file(path)
     # 按参数索引嵌套数据
     for arg in args:
         try:
@@ -64,7 +119,7 @@ def get_api(filepath: str, *args: Any) -> dict:
         except KeyError:
             print(f"❌ 参数 `{arg}` 不存在于 API 数据中")
             sys.exit(1)
-    return data
+    return copy.deepcopy(data)
 
 
 @dataclasses.dataclass
@@ -80,10 +135,12 @@ class Api:
     response_schema: Optional[dict] = Field(default_factory=dict)
     schema_: Optional[dict] = Field(default_factory=dict)
     comment: str = ""
-    auth: Auth = Field(default_factory=Auth)
+    auth: Auth = Field(default_factory=get_auth)
     headers: dict = Field(default_factory=dict)
     files: Optional[Any] = None
     skip: bool = Field(default=False)
+    name: str = ""  # 接口名称, 如 file.list_files, 用作校验器的缓存键
+    validation: Optional[ValidationPolicy] = None  # 为 None 时使用默认策略
 
     def __post_init__(self) -> None:
         """
@@ -95,7 +152,7 @@ class Api:
         self.params = self.params or None
         self.response_schema = self.response_schema or None
         self.schema_ = self.schema_ or None
-        self.auth = self.auth or Auth()
+        self.auth = self.auth or get_auth()
         self.headers = self.headers or HEADERS.copy()
         self.files = self.files or None
 
@@ -106,9 +163,9 @@ class Api:
         # 如果 v 是 list,则将其转换为 str
         for k, v in value.items():
             if isinstance(v, list):
-                value[k] = json5.dumps(v, ensure_ascii=False, separators=(",", ":"))
+                value[k] = json.dumps(v, ensure_ascii=False, separators=(",", ":"))
             elif isinstance(v, dict):
-                value[k] = json5.dumps(v, ensure_ascii=False, separators=(",", ":"))
+                value[k] = json.dumps(v, ensure_ascii=False, separators=(",", ":"))
         setattr(self, attr, value)
         return self
 
@@ -116,7 +173,7 @@ class Api:
         def stringify_values(obj):
             if isinstance(obj, dict):
                 return {
-                    k: json5.dumps(v, ensure_ascii=False, separators=(",", ":"))
+                    k: json.dumps(v, ensure_ascii=False, separators=(",", ":"))
                     if isinstance(v, (dict, list))
                     else v
                     for k, v in obj.items()
@@ -189,6 +246,8 @@ class Api:
         """
         准备请求参数
         """
+        # 惰性检查 access_token 是否过期, 过期时(单线程)刷新
+        _ = self.auth.token
         self.update_attr2()
         headers = self.headers.copy()
         if not self.files:
@@ -227,39 +286,103 @@ class Api:
         """
         # 处理请求参数
         config: dict = self._prepare_request()
+        # 同类接口共享限速器, 风控时一起降速
+        limiter = get_limiter(classify_url(config["url"]))
         for _ in range(3):
-            response = requests.request(**config)
+            used_token = self.auth.access_token
+            limiter.acquire()
+            response = get_session().request(**config)
             # print("response.url:", response.url)
             response.raise_for_status()
-            code = response.json().get("errno", None)
+            res_json = response.json()
+            code = res_json.get("errno", None)
             if code == 31034:
                 print("❌ 风控,请稍后再试")
-                time.sleep(3)
+                limiter.on_throttle()
             elif code == -1:
-                # 权益已过期
-                self.auth.refresh_access_token()
+                # 权益已过期, 刷新后用新的 access_token 重新生成请求
+                self.auth.refresh_if_stale(used_token)
+                config = self._prepare_request()
             else:
+                limiter.on_success()
                 break
 
         if byte:
             return response.text
 
+        return self._check_response(response, res_json)
+
+    def _check_response(self, response: Any, res_json: dict) -> dict:
+        """按校验策略检查响应数据"""
         if self.skip:
             # 如果不需要验证响应数据的 schema_,则直接返回
-            return response.json()
-        if self.schema_:
-            res_json: dict = response.json()
+            return res_json
+        policy = current_policy(self.validation)
+        if self.schema_ and policy.mode != "off":
             BaseResponse.model_validate(res_json)
-            validate(instance=res_json, schema=self.schema_)
+            validate_schema(res_json, self.schema_, policy, key=self.name)
 
         if self.response_schema:
-            check = self.validate_response_schema(response, self.response_schema)
+            check = self.validate_response_schema(
+                response, self.response_schema, key=self.name
+            )
             if check:
-                return response.json()
+                return res_json
             else:
                 raise ValueError("❌ 利用 response_schema 校验失败")
 
-        return response.json()
+        return res_json
+
+    async def arequest(self, byte: bool = False) -> Union[int, str, dict, bytes, None]:
+        """
+        异步发送请求并返回结果 (基于 httpx), 逻辑与 `request` 相同
+
+        Args:
+            byte (bool): 是否返回字节流,默认为 False
+        """
+        config: dict = await self._aprepare_request()
+        client = get_async_client()
+        limiter = get_limiter(classify_url(config["url"]))
+        for _ in range(3):
+            used_token = self.auth.access_token
+            await limiter.aacquire()
+            response = await client.request(**config)
+            response.raise_for_status()
+            res_json = response.json()
+            code = res_json.get("errno", None)
+            if code == 31034:
+                print("❌ 风控,请稍后再试")
+                limiter.on_throttle()
+            elif code == -1:
+                # 权益已过期, 刷新后用新的 access_token 重新生成请求
+                await asyncio.to_thread(self.auth.refresh_if_stale, used_token)
+                config = await self._aprepare_request()
+            else:
+                limiter.on_success()
+                break
+
+        if byte:
+            return response.text
+
+        return self._check_response(response, res_json)
+
+    async def _aprepare_request(self) -> dict:
+        """`_prepare_request` 的异步版本
+
+        access_token 过期时刷新是阻塞的网络请求 (还可能等待 `_refresh_lock`),
+        先在线程中完成, 不阻塞事件循环.
+        """
+        if self.auth._is_token_expired():
+            await asyncio.to_thread(getattr, self.auth, "token")
+        return self._async_config(self._prepare_request())
+
+    @staticmethod
+    def _async_config(config: dict) -> dict:
+        """requests 会丢弃值为 None 的 params/data, httpx 不会, 这里保持一致"""
+        for key in ("params", "data"):
+            if isinstance(config.get(key), dict):
+                config[key] = {k: v for k, v in config[key].items() if v is not None}
+        return config
 
     @property
     def result(self) -> dict:
@@ -269,8 +392,18 @@ class Api:
         else:
             raise ValueError(f"❌ 响应数据解析失败: {res}")
 
+    async def aresult(self) -> dict:
+        """`result` 的异步版本"""
+        res = await self.arequest()
+        if isinstance(res, dict):
+            return res
+        else:
+            raise ValueError(f"❌ 响应数据解析失败: {res}")
+
     @staticmethod
-    def validate_response_schema(response: requests.Response, schema_: dict) -> bool:
+    def validate_response_schema(
+        response: requests.Response, schema_: dict, key: str = ""
+    ) -> bool:
         if not schema_:
             return True
         try:
@@ -280,29 +413,11 @@ class Api:
             print(f"❌ 响应数据解析失败: {response.text}\n错误: {e}")
             return False
 
-        type_mapping = {
-            "string": str,
-            "number": (int, float),
-            "int": int,
-            "float": float,
-            "boolean": bool,
-            "bool": bool,
-            "object": dict,
-            "array": list,
-        }
-
-        errors = []
         # 校验响应数据, 和普通的 jsonschema 校验不同的是,这里的 schema_ 是一个 dict
         # 比如 { "key": "string" } 代表 key 的值是 string 类型
         # 比如 {"key": "int"} 代表 key 的值是 int 类型
-        for k, rule in schema_.items():
-            expected_type = type_mapping.get(rule["type"])
-            actual = jsonpath(res_json, f"$..{k}")
-            if not actual:
-                errors.append(f"Key '{k}' 不存在于响应中")
-                continue
-            if expected_type and not isinstance(actual[0], expected_type):
-                errors.append(f"Key '{k}' 预期类型: {rule['type']}")
+        # 所有规则在一次遍历中检查完毕
+        errors = get_response_checker(schema_, key).check(res_json)
         if errors:
             for error in errors:
                 print(f"❌ {error}")
@@ -314,6 +429,7 @@ class Api:
 
 __all__ = [
     "get_api",
+    "get_auth",
     "Api",
     "Auth",
 ]
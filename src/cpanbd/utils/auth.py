@@ -43,18 +43,18 @@ BAIDU_REFRESH_TOKEN=
 
 import os
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urlencode
 
-import requests
 from dotenv import set_key
-from jsonschema import validate
 from pydantic import dataclasses
 from tenacity import retry, stop_after_attempt, wait_random
 
-from .const import HEADERS, load_env
+from .const import HEADERS, ensure_env
+from .session import get_session
 
 schema_ = {
     "type": "object",
@@ -77,6 +77,12 @@ schema_ = {
 }
 
 
+def _validate_token(res: dict) -> None:
+    from jsonschema import validate
+
+    validate(instance=res, schema=schema_)
+
+
 @dataclasses.dataclass
 class Auth:
     """
@@ -93,7 +99,14 @@ class Auth:
         """
         初始化 Auth 对象
         """
-        load_env()
+        ensure_env()  # 每个进程只读取一次 .env
+        # 类属性的默认值在导入时就已确定, 这里用 .env 中的值补齐
+        self.access_token = self.access_token or os.getenv("BAIDU_ACCESS_TOKEN")
+        self.access_expiredAt = self.access_expiredAt or os.getenv("BAIDU_EXPIREDAT")
+        self.access_refresh_token = self.access_refresh_token or os.getenv(
+            "BAIDU_REFRESH_TOKEN"
+        )
+        self._refresh_lock = threading.Lock()
 
         if not self.access_token:
             # 如果没有 access_token, 需要获取
@@ -109,6 +122,11 @@ class Auth:
         self.access_expiredAt = datetime.fromtimestamp(timestamp).isoformat()
         self.access_refresh_token = res["refresh_token"]
 
+        # 同步到当前进程的环境变量, 使 `{{ BAIDU_ACCESS_TOKEN }}` 等模板拿到新值
+        os.environ["BAIDU_ACCESS_TOKEN"] = self.access_token
+        os.environ["BAIDU_EXPIREDAT"] = self.access_expiredAt
+        os.environ["BAIDU_REFRESH_TOKEN"] = self.access_refresh_token
+
         # 将 access_token 存入环境文件
         project_env_path = os.path.join(os.getcwd(), ".env")
         system_env_path = os.path.join(os.path.expanduser("~"), ".env.panbd")
@@ -162,10 +180,10 @@ class Auth:
 
         # 验证返回值
         try:
-            res = requests.request(**d1, headers=HEADERS)
+            res = get_session().request(**d1, headers=HEADERS)
             res.raise_for_status()
             res = res.json()
-            validate(instance=res, schema=schema_)
+            _validate_token(res)
         except Exception as e:
             print(f"❌ access_token 获取失败: {e}")
             sys.exit(1)
@@ -192,10 +210,25 @@ class Auth:
         """
         if self._is_token_expired():
             print("⚠️ access_token 已过期,正在刷新...")
-            self.refresh_access_token()
+            self.refresh_if_stale(self.access_token)
 
         return self.access_token
 
+    def refresh_if_stale(self, stale_token: Optional[str]) -> "Auth":
+        """在 access_token 仍为 `stale_token` 时刷新 (多线程下只刷新一次)
+
+        多个线程同时发现令牌失效时, 只有第一个拿到锁的线程调用 `refresh_access_token`,
+        其余线程等待刷新完成后直接使用新的令牌.
+
+        Args:
+            stale_token (str | None): 调用方发现失效的 access_token
+        """
+        with self._refresh_lock:
+            if self.access_token != stale_token:
+                # 其他线程已经刷新过了
+                return self
+            return self.refresh_access_token()
+
     def set_access_token(self, access_token: str) -> "Auth":
         """
         设置 access_token, 一次性的,不会保存到环境变量中,且不会检查是否过期
@@ -219,7 +252,8 @@ class Auth:
             "url": "https://openapi.baidu.com/oauth/2.0/token",
             "params": {
                 "grant_type": "refresh_token",
-                "refresh_token": os.getenv("BAIDU_REFRESH_TOKEN"),
+                "refresh_token": self.access_refresh_token
+                or os.getenv("BAIDU_REFRESH_TOKEN"),
                 "client_id": os.getenv("BAIDU_API_APPKEY"),
                 "client_secret": os.getenv("BAIDU_API_SECRETKEY"),
             },
@@ -234,11 +268,11 @@ class Auth:
             print("❌ 无法刷新 , 请设置环境变量 BAIDU_API_SECRETKEY")
             sys.exit(1)
 
-        res = requests.request(**d1, headers=HEADERS)
+        res = get_session().request(**d1, headers=HEADERS)
         try:
             res.raise_for_status()
             res = res.json()
-            validate(instance=res, schema=schema_)
+            _validate_token(res)
         except Exception as e:
             print(f"❌ access_token 刷新失败: {e}")
             sys.exit(1)
@@ -246,6 +280,35 @@ class Auth:
         return self
 
 
+_shared_auth: Optional[Auth] = None
+_shared_lock = threading.Lock()
+
+
+def get_auth() -> Auth:
+    """获取进程内共享的 Auth 对象
+
+    第一次调用时创建 (读取一次 .env), 之后所有客户端和线程共用同一个对象,
+    令牌过期时只会刷新一次.
+    """
+    global _shared_auth
+    if _shared_auth is None:
+        with _shared_lock:
+            if _shared_auth is None:
+                _shared_auth = Auth()
+    return _shared_auth
+
+
+def set_auth(auth: Auth) -> None:
+    """替换进程内共享的 Auth 对象
+
+    Args:
+        auth (Auth): 新的 Auth 对象, 比如通过 `Auth().set_access_token(...)` 得到的
+    """
+    global _shared_auth
+    with _shared_lock:
+        _shared_auth = auth
+
+
 if __name__ == "__main__":
     auth = Auth()
     print(auth)
@@ -1,29 +1,74 @@
+import asyncio
 import contextvars
 import inspect
 import sys
-from functools import wraps
-from typing import Any, Callable, Optional, Union
+import weakref
+from functools import lru_cache, wraps
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, Union
 
 from tenacity import RetryCallState, retry, stop_after_attempt, wait_random
 
 from .api import Api, Auth, get_api
-from .core import FieldParser
+from .const import ensure_env
+from .core import RequestPlan
+from .validation import ValidationMode, ValidationPolicy, as_policy
 
 # 通用装饰器:自动收集参数并调用 API
 caller_var = contextvars.ContextVar("caller_name", default="unknown")
 
 
+def _stub() -> None:
+    """只有文档字符串的函数"""
+
+
+_STUB_CODE = _stub.__code__.co_code
+_FAST_KINDS = (
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    inspect.Parameter.KEYWORD_ONLY,
+)
+
+
 def auto_args_call_api(arg: Union[Callable, str, None] = None) -> Callable:
     def decorator(func: Callable, api_name: Optional[str] = None) -> Callable:
-        @wraps(func)
-        def wrapper(self, *args, **kwargs) -> dict:
-            func(self, *args, **kwargs)
-            bound_args = inspect.signature(func).bind(self, *args, **kwargs)
+        # 签名只在装饰时解析一次
+        signature = inspect.signature(func)
+        params = list(signature.parameters.values())[1:]  # 去掉 self
+        defaults = tuple((p.name, p.default) for p in params)
+        names = frozenset(p.name for p in params)
+        fast = all(p.kind in _FAST_KINDS for p in params)
+        # 接口函数体一般只有文档字符串, 这种情况不需要再调用一次
+        is_stub = func.__code__.co_code == _STUB_CODE
+        mmkey = api_name or func.__name__
+        fn_name = func.__name__
+
+        def bind(self, args: tuple, kwargs: dict) -> dict:
+            if fast and not args and names.issuperset(kwargs):
+                # 只有关键字参数: 直接用默认值补齐
+                arguments = {}
+                for name, default in defaults:
+                    if name in kwargs:
+                        arguments[name] = kwargs[name]
+                    elif default is inspect.Parameter.empty:
+                        break  # 缺少必填参数, 交给 inspect 报错
+                    else:
+                        arguments[name] = default
+                else:
+                    return arguments
+            bound_args = signature.bind(self, *args, **kwargs)
             bound_args.apply_defaults()
             arguments = dict(bound_args.arguments)
             arguments.pop("self")
-            caller_var.set(func.__name__)
-            return self._call_api(api_name or func.__name__, **arguments)
+            return arguments
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs) -> dict:
+            if not is_stub:
+                func(self, *args, **kwargs)
+            arguments = bind(self, args, kwargs)
+            if caller_var.get() != fn_name:
+                caller_var.set(fn_name)
+            return self._call_api(mmkey, **arguments)
 
         return wrapper
 
@@ -32,11 +77,33 @@ def auto_args_call_api(arg: Union[Callable, str, None] = None) -> Callable:
     return lambda func: decorator(func, api_name=arg)
 
 
+@lru_cache(maxsize=None)
+def get_request_plans(filepath: str) -> Mapping[str, RequestPlan]:
+    """编译 `apijson/{filepath}.json` 中的所有接口, 每个进程只编译一次
+
+    Args:
+        filepath (str): API 所属分类, 即 `apijson/***.json` 下的文件名(不含后缀名)
+
+    Returns:
+        Mapping[str, RequestPlan]: 接口名称 -> 请求计划 (只读)
+    """
+    apis = get_api(filepath)
+    return MappingProxyType({k: RequestPlan(k, v) for k, v in apis.items()})
+
+
 class BaseApiClient:
-    def __init__(self, filepath: str, auth: Optional[Auth] = None) -> None:
+    def __init__(
+        self,
+        filepath: str,
+        auth: Optional[Auth] = None,
+        validation: Union[ValidationPolicy, ValidationMode, None] = None,
+    ) -> None:
+        ensure_env()  # 第一次创建客户端时才读取 .env 配置
         self.auth = auth
+        self.validation: Optional[ValidationPolicy] = as_policy(validation)
         self.filepath = filepath
         self.API: dict[str, Any] = get_api(self.filepath)
+        self.plans: Mapping[str, RequestPlan] = get_request_plans(self.filepath)
 
     @retry(
         stop=stop_after_attempt(10),
@@ -52,31 +119,44 @@ class BaseApiClient:
 
 
         """
+        return self._build_api(mmkey, data).result
+
+    def _build_api(self, mmkey: str, data: dict) -> Api:
+        """根据请求计划和用户参数构造 Api 对象"""
         api = self.API[mmkey]  # 是一个字典
-        parsed = FieldParser.parse_dict(api)
+        plan = self.plans[mmkey]
 
         #### 特殊处理参数
         if data and "content_md5" in data:
             data["content-md5"] = data.pop("content_md5")
         if data and "slice_md5" in data:
             data["slice-md5"] = data.pop("slice_md5")
-
-        checked_data = FieldParser.validate_and_fill_input(parsed, data)
-        api_instance = Api(**checked_data)
+        if data and "aasync" in data:
+            data["async"] = data.pop("aasync")
+
+        checked_data = plan.fill(data)
+        if self.auth is not None:
+            checked_data.setdefault("auth", self.auth)
+        checked_data.setdefault("schema_", plan.schema_)
+        checked_data.setdefault("response_schema", plan.response_schema)
+        api_instance = Api(
+            **checked_data,
+            name=f"{self.filepath}.{mmkey}",
+            validation=self.validation,
+        )
         method = api_instance.method.upper()
         residual_params = {
             k: v
             for k, v in data.items()
             if v is not None
-            and k not in (api_instance.params or {})
-            and k not in (api_instance.data or {})
+            and k not in plan.accepted
             and k not in ["url", "URL", "skip", "files", "method"]
         }
         if residual_params:
             print(f"❌ 发现多余的参数: {residual_params.keys()}, 请检查 API 配置")
             sys.exit(1)
         if method in ["GET", "POST", "PUT", "DELETE"]:
-            return api_instance.result  # type: ignore
+            return api_instance
         else:
             print("----" * 10)
             print("❌ 无法识别的请求类型,请检查 API 配置")
@@ -91,9 +171,9 @@ class BaseApiClient:
         # 获取上下文中的调用者名
         fn_name = caller_var.get()
         args = retry_state.args
-        kwargs = retry_state.kwargs
-        if kwargs and "files" in kwargs:
-            kwargs.pop("files", None)
+        # 复制一份再去掉文件内容, retry_state.kwargs 会原样用于下一次重试
+        kwargs = dict(retry_state.kwargs or {})
+        kwargs.pop("files", None)
 
         exception = (
             retry_state.outcome.exception() if retry_state.outcome is not None else None
@@ -111,3 +191,52 @@ class BaseApiClient:
         else:
             print("⏳ 等待时间未知, 无法获取 next_action.sleep\n")
         print("---" * 10)
+
+
+DEFAULT_MAX_CONCURRENCY = 64  # 异步客户端默认的最大并发请求数
+
+
+class AsyncBaseApiClient(BaseApiClient):
+    """异步客户端基类
+
+    与 `BaseApiClient` 使用同一份 apijson 定义和请求计划, 只是请求通过 `httpx.AsyncClient` 发送.
+    `auto_args_call_api` 装饰的接口方法在异步客户端上返回协程, 需要 `await`.
+
+    Attributes:
+        max_concurrency (int): 同一个客户端同时进行的最大请求数
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        auth: Optional[Auth] = None,
+        validation: Union[ValidationPolicy, ValidationMode, None] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        super().__init__(filepath=filepath, auth=auth, validation=validation)
+        self.max_concurrency = max_concurrency
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio.Semaphore 与事件循环绑定, 每个事件循环各用一个
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_random(min=1, max=5),
+        before_sleep=lambda state: BaseApiClient.print_retry_info(state),
+    )
+    async def _call_api(self, mmkey: str, **data: Any) -> dict:  # type: ignore[override]
+        """统一的异步 API 调用方式
+
+        Args:
+            mmkey (str): API 的名称, 来源于json文件的 mmkey
+            **data (Any): 请求的参数, 这些参数会覆盖 API 配置中的默认值
+        """
+        api_instance = self._build_api(mmkey, data)
+        async with self._get_semaphore():
+            return await api_instance.aresult()
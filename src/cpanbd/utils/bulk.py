@@ -0,0 +1,246 @@
+"""批量文件管理
+
+`File.filemanager` 每次最多处理 100 个文件, 异步执行时只返回 taskid. `BulkFileManager` 接受任意数量的
+复制、移动、重命名、删除操作:
+
+- 按 100 个一批拆分, 同时最多提交 `max_inflight` 批 (请求仍经过共享的限速器)
+- 返回 taskid 时轮询 `taskquery` 直到任务结束
+- 按输入顺序返回每一项的结果 `BulkItemResult`
+
+```python
+from cpanbd import File
+
+file = File()
+results = file.bulk(max_inflight=4).delete([f"/tmp/{i}.txt" for i in range(300)])
+print(sum(r.ok for r in results), "个删除成功")
+```
+"""
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Literal, Optional, Union
+
+from pydantic import Field, dataclasses
+
+if TYPE_CHECKING:
+    from ..file import File
+
+MAX_OPS_PER_REQUEST = 100  # filemanager 每次请求 filelist 的上限
+UNCONFIRMED_ERRNO = -2  # 接口返回中找不到该项, 无法确认是否成功
+
+Opera = Literal["copy", "move", "rename", "delete"]
+Ondup = Literal["fail", "newcopy", "overwrite", "skip"]
+FileOp = Union[dict[str, Any], str]
+
+
+@dataclasses.dataclass
+class BulkItemResult:
+    """
+    单个操作的结果
+
+    Attributes:
+        index (int): 该操作在输入中的序号
+        item (dict | str): 输入的操作, 删除时为路径
+        errno (int): 错误码, 0 为成功; -1 为请求异常, -2 (`UNCONFIRMED_ERRNO`) 为接口返回中
+            找不到该项, 无法确认是否成功
+        detail (dict): 接口返回的该项信息, 或任务/异常信息; 无法确认时为整个返回值
+    """
+
+    index: int
+    item: Any
+    errno: int
+    detail: dict = Field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.errno == 0
+
+
+def _item_path(item: FileOp) -> Optional[str]:
+    return item if isinstance(item, str) else item.get("path")
+
+
+class BulkFileManager:
+    """批量执行 filemanager 操作, 每批 100 个, 多批并发
+
+    Attributes:
+        file (File): File 对象
+        chunk_size (int): 每批数量, 最大 100
+        max_inflight (int): 同时提交的批数
+        aasync (int): 传给 filemanager 的 async, 0 同步, 1 自适应, 2 异步, 默认为 2
+        ondup (str): 遇到重复文件的处理策略, fail、newcopy、overwrite、skip
+        poll_interval (float): 轮询异步任务的初始间隔(秒), 之后逐渐增大到 10 秒
+        poll_timeout (float): 等待单个异步任务的最长时间(秒)
+    """
+
+    def __init__(
+        self,
+        file: "File",
+        chunk_size: int = MAX_OPS_PER_REQUEST,
+        max_inflight: int = 4,
+        aasync: Literal[0, 1, 2] = 2,
+        ondup: Ondup = "fail",
+        poll_interval: float = 1.0,
+        poll_timeout: float = 600.0,
+    ) -> None:
+        self.file = file
+        self.chunk_size = max(1, min(chunk_size, MAX_OPS_PER_REQUEST))
+        self.max_inflight = max(1, max_inflight)
+        self.aasync = aasync
+        self.ondup = ondup
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+
+    # ---------- 对外接口 ----------
+
+    def copy(
+        self, filelist: Iterable[dict[str, Any]], ondup: Optional[Ondup] = None
+    ) -> list[BulkItemResult]:
+        """批量复制, 每项形如 `{"path": "/a/1.txt", "dest": "/b", "newname": "1.txt"}`"""
+        return self.run("copy", filelist, ondup)
+
+    def move(
+        self, filelist: Iterable[dict[str, Any]], ondup: Optional[Ondup] = None
+    ) -> list[BulkItemResult]:
+        """批量移动, 每项形如 `{"path": "/a/1.txt", "dest": "/b", "newname": "1.txt"}`"""
+        return self.run("move", filelist, ondup)
+
+    def rename(
+        self, filelist: Iterable[dict[str, Any]], ondup: Optional[Ondup] = None
+    ) -> list[BulkItemResult]:
+        """批量重命名, 每项形如 `{"path": "/a/1.txt", "newname": "2.txt"}`"""
+        return self.run("rename", filelist, ondup)
+
+    def delete(self, paths: Iterable[str]) -> list[BulkItemResult]:
+        """批量删除, 每项为网盘路径"""
+        return self.run("delete", paths)
+
+    def run(
+        self, opera: Opera, filelist: Iterable[FileOp], ondup: Optional[Ondup] = None
+    ) -> list[BulkItemResult]:
+        """执行任意数量的操作, 按输入顺序返回每一项的结果"""
+        results = list(self.iter_run(opera, filelist, ondup))
+        results.sort(key=lambda r: r.index)
+        return results
+
+    def iter_run(
+        self, opera: Opera, filelist: Iterable[FileOp], ondup: Optional[Ondup] = None
+    ) -> Iterator[BulkItemResult]:
+        """与 `run` 相同, 但每批完成后立即返回该批的结果 (批之间的顺序不固定)
+
+        filelist 可以是生成器, 同一时刻只有 `max_inflight` 批在内存中.
+        """
+        ondup = ondup or self.ondup
+        items = iter(filelist)
+        start = 0
+        running: set[Future] = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_inflight)
+        try:
+            while True:
+                while len(running) < self.max_inflight:
+                    chunk = list(islice(items, self.chunk_size))
+                    if not chunk:
+                        break
+                    running.add(
+                        executor.submit(self._run_chunk, opera, start, chunk, ondup)
+                    )
+                    start += len(chunk)
+                if not running:
+                    return
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def wait_task(self, taskid: int) -> dict[str, Any]:
+        """轮询异步任务直到结束, 返回最后一次 `taskquery` 的结果
+
+        超时时返回 `{"status": "timeout", "taskid": taskid}`
+        """
+        deadline = time.monotonic() + self.poll_timeout
+        interval = self.poll_interval
+        while True:
+            res = self.file.taskquery(taskid=taskid) or {}
+            if res.get("status") in ("success", "failed"):
+                return res
+            if time.monotonic() + interval > deadline:
+                return {"status": "timeout", "taskid": taskid}
+            time.sleep(interval)
+            interval = min(interval * 1.5, 10.0)
+
+    # ---------- 内部实现 ----------
+
+    def _run_chunk(
+        self, opera: Opera, start: int, chunk: list[FileOp], ondup: Ondup
+    ) -> list[BulkItemResult]:
+        try:
+            res = self.file.filemanager(
+                opera=opera,
+                filelist=json.dumps(chunk, ensure_ascii=False, separators=(",", ":")),
+                aasync=self.aasync,
+                ondup=ondup,
+            )
+        except Exception as e:
+            return self._fail_all(start, chunk, -1, {"error": str(e)})
+        res = res or {}
+        if res.get("taskid"):
+            task = self.wait_task(res["taskid"])
+            if task.get("status") == "success":
+                return self._from_info(start, chunk, task.get("list") or [], task)
+            errno = task.get("task_errno") or task.get("errno") or -1
+            return self._fail_all(start, chunk, errno, task)
+        info = res.get("info") or []
+        if not info and res.get("errno"):
+            return self._fail_all(start, chunk, res["errno"], res)
+        return self._from_info(start, chunk, info, res)
+
+    @staticmethod
+    def _fail_all(
+        start: int, chunk: list[FileOp], errno: int, detail: dict
+    ) -> list[BulkItemResult]:
+        return [
+            BulkItemResult(index=start + i, item=item, errno=errno, detail=detail)
+            for i, item in enumerate(chunk)
+        ]
+
+    @staticmethod
+    def _from_info(
+        start: int, chunk: list[FileOp], info: list, res: dict
+    ) -> list[BulkItemResult]:
+        """把接口返回的 info/list 与输入一一对应
+
+        返回中找不到的项 (如任务成功但 list 为空) 不能确认已经执行, 视为失败:
+        errno 为整个返回的 errno, 没有时为 `UNCONFIRMED_ERRNO`, detail 为整个返回值.
+        """
+        if len(info) == len(chunk):
+            matched: list[Optional[dict]] = list(info)
+        else:
+            by_path = {
+                entry.get("path") or entry.get("from"): entry
+                for entry in info
+                if isinstance(entry, dict)
+            }
+            matched = [by_path.get(_item_path(item)) for item in chunk]
+        results = []
+        for i, (item, entry) in enumerate(zip(chunk, matched, strict=True)):
+            if isinstance(entry, dict) and entry:
+                errno = int(entry.get("errno") or 0)
+                detail = entry
+            else:
+                errno = int(res.get("errno") or UNCONFIRMED_ERRNO)
+                detail = res
+            results.append(
+                BulkItemResult(index=start + i, item=item, errno=errno, detail=detail)
+            )
+        return results
+
+
+__all__ = [
+    "MAX_OPS_PER_REQUEST",
+    "UNCONFIRMED_ERRNO",
+    "BulkFileManager",
+    "BulkItemResult",
+]
@@ -1,10 +1,14 @@
 import os
 import re
+import threading
 from pathlib import Path
 from typing import Any
 
 from dotenv import find_dotenv, load_dotenv
 
+_env_loaded = False
+_env_lock = threading.Lock()
+
 
 def load_env():
     """加载 .env 配置(优先项目目录, 其次系统目录)"""
@@ -24,15 +28,37 @@ def load_env():
             return
 
 
-load_env()
+def ensure_env() -> None:
+    """加载 .env 配置, 每个进程只加载一次 (第一次用到配置时)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            load_env()
+            _env_loaded = True
+
+
+def get_appname() -> str:
+    """获取应用名称 `BAIDU_APPNAME`, 百度规定只能上传到 /apps/{BAIDU_APPNAME} 目录下"""
+    ensure_env()
+    appname = os.getenv("BAIDU_APPNAME", None)
+    assert appname, "BAIDU_APPNAME 环境变量未设置"
+    return appname
+
+
+def __getattr__(name: str) -> Any:
+    # APPNAME 在第一次访问时才读取配置, 导入本模块不会读取 .env
+    if name == "APPNAME":
+        return get_appname()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 HEADERS = {
     "User-Agent": "pan.baidu.com",
     "Content-Type": "application/json",
 }
 BASE_URL = "https://pan.baidu.com"
-APPNAME = os.getenv("BAIDU_APPNAME", None)
-
-assert APPNAME, "BAIDU_APPNAME 环境变量未设置"
 
 TEMPLATE_PATTERN = re.compile(r"{{\s*([\w\.]+)\s*}}", re.IGNORECASE)
 EMBEDDED_TEMPLATE_PATTERN = re.compile(r"{{{\s*([\w\.]+)\s*}}}", re.IGNORECASE)
@@ -1,6 +1,8 @@
+import copy
 import os
 import re
-from typing import Any, Dict, Optional, Type, Union
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple, Type, Union
 
 from pydantic import ConfigDict
 from pydantic.dataclasses import dataclass
@@ -230,3 +232,130 @@ class FieldParser:
                 result[special] = user_input[special]
 
         return result
+
+
+# RequestPlan 中字段的取值方式
+_CONST = 0  # 常量/默认值
+_ENV = 1  # {{ KEY }} 整体模板, 每次调用时读取环境变量
+_EMBEDDED = 2  # {{{ key }}} 嵌入式模板, 用调用参数替换
+
+# (字段名, 是否必填, 取值方式, 默认值, 嵌套字段)
+_PlanField = Tuple[str, bool, int, Any, Optional[tuple]]
+
+SKIP_FIELD = ParsedField(
+    name="skip",
+    type_=bool,
+    required=False,
+    default=False,
+    is_constant=True,
+)
+
+
+def _compile_field(key: str, field: ParsedField) -> _PlanField:
+    if field.is_template and field.template_key:
+        return (key, field.required, _ENV, field.template_key, None)
+    if field.is_template and isinstance(field.default, str):
+        return (key, field.required, _EMBEDDED, field.default, None)
+    return (key, field.required, _CONST, field.default, None)
+
+
+class RequestPlan:
+    """预编译的请求计划
+
+    每个接口的 apijson 定义只解析一次 (`FieldParser.parse_dict`), 编译成不可变的字段表.
+    每次调用时只需要把用户参数填进去, 结果与 `FieldParser.validate_and_fill_input` 一致.
+
+    Attributes:
+        name (str): 接口名称, 即 apijson 中的 key
+        template (Mapping): 解析后的字段模板 (只读)
+        accepted (frozenset[str]): `params`/`data` 中允许用户传入的参数名
+        schema_ (dict | None): 响应数据的 jsonschema
+        response_schema (dict | None): 响应数据的简易校验规则
+    """
+
+    __slots__ = (
+        "name",
+        "template",
+        "accepted",
+        "schema_",
+        "response_schema",
+        "_fields",
+    )
+
+    def __init__(self, name: str, api: Dict[str, Any]) -> None:
+        parsed: Dict[str, Any] = FieldParser.parse_dict(api)
+        parsed["skip"] = SKIP_FIELD
+
+        fields = []
+        accepted = set()
+        for key, value in parsed.items():
+            if isinstance(value, dict):
+                nested = []
+                for nested_key, nested_field in value.items():
+                    if isinstance(nested_field, dict):
+                        raise ValueError(f"暂不支持三层嵌套字段: {key}.{nested_key}")
+                    nested.append(_compile_field(nested_key, nested_field))
+                fields.append((key, False, _CONST, None, tuple(nested)))
+                if key in ("params", "data"):
+                    accepted.update(value)
+                parsed[key] = MappingProxyType(value)
+            else:
+                fields.append(_compile_field(key, value))
+
+        self.name = name
+        self.template: Mapping[str, Any] = MappingProxyType(parsed)
+        self.accepted = frozenset(accepted)
+        self.schema_: Optional[dict] = api.get("schema_") or None
+        self.response_schema: Optional[dict] = api.get("response_schema") or None
+        self._fields: Tuple[_PlanField, ...] = tuple(fields)
+
+    @staticmethod
+    def _value(kind: int, default: Any, user_input: Dict[str, Any]) -> Any:
+        if kind == _ENV:
+            return os.getenv(default, f"{{{{ {default} }}}}")
+        if kind == _EMBEDDED:
+            return FieldParser._replace_embedded_templates(default, user_input)
+        if isinstance(default, (list, dict)):
+            return copy.copy(default)
+        return default
+
+    def fill(self, user_input: Dict[str, Any]) -> Dict[str, Any]:
+        """用用户参数填充请求计划
+
+        Args:
+            user_input (dict): 用户传入的参数
+
+        Returns:
+            dict: 可直接用于构造 `Api` 的参数
+        """
+        result: Dict[str, Any] = {}
+        for key, required, kind, default, nested in self._fields:
+            if nested is not None:
+                nested_result = {}
+                for n_key, n_required, n_kind, n_default, _ in nested:
+                    if n_key in user_input:
+                        # 保留 None 值
+                        nested_result[n_key] = user_input[n_key]
+                    elif n_required:
+                        raise ValueError(f"缺少必填字段: `{key}.{n_key}`")
+                    else:
+                        nested_result[n_key] = self._value(
+                            n_kind, n_default, user_input
+                        )
+                result[key] = nested_result
+            elif key in user_input:
+                result[key] = user_input[key]
+            elif required:
+                raise ValueError(f"缺少必填字段: `{key}`")
+            else:
+                result[key] = self._value(kind, default, user_input)
+
+        # 特殊保留字段：直接覆盖模板中的默认值
+        for special in FieldParser.SKIP_KEYS:
+            if special != "comment" and special in user_input:
+                result[special] = user_input[special]
+
+        return result
+
+    def __repr__(self) -> str:
+        return f"RequestPlan(name={self.name!r})"
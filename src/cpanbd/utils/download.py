@@ -5,17 +5,18 @@ from pathlib import Path
 from threading import Lock
 from typing import Optional
 
-import requests
 from pydantic import Field, validate_call
 from tenacity import retry, stop_after_attempt, wait_random
-from tqdm import tqdm
 
 from .md5 import check_hash
+from .ratelimit import get_limiter
+from .session import get_session
 
 
 @retry(stop=stop_after_attempt(10), wait=wait_random(min=1, max=5))
 def get_final_url(url: str, headers: dict) -> str:
-    response = requests.head(url, allow_redirects=True, headers=headers)
+    get_limiter("download").acquire()
+    response = get_session().head(url, allow_redirects=True, headers=headers)
     return response.url
 
 
@@ -58,11 +59,17 @@ def download_chunk(
 
         thread_headers = headers.copy()
         thread_headers.update({"Range": f"bytes={start}-{end}"})
-        response = requests.get(url, headers=thread_headers, stream=True)
+        limiter = get_limiter("download")
+        limiter.acquire()
+        response = get_session().get(url, headers=thread_headers, stream=True)
 
         meta_info["last_status_code"] = response.status_code
+        if response.status_code in [429, 503]:
+            # 被限流, 所有下载线程一起降速
+            limiter.on_throttle()
 
         if response.status_code in [200, 206]:
+            limiter.on_success()
             content_range = response.headers.get("Content-Range", "")
             expected_prefix = f"bytes {start}-{end}"
             if not content_range.startswith(expected_prefix):
@@ -90,6 +97,7 @@ def download_chunk(
                 with open(meta_path, "w", encoding="utf-8") as mf:
                     json.dump(meta_data, mf, indent=2)
         else:
+            response.close()  # 归还连接到连接池
             raise Exception(f"线程 {thread_id}: 状态码 {response.status_code}")
 
     except Exception as e:
@@ -181,7 +189,7 @@ def download_file(
         print("❌ 无法获取最终的下载链接. ")
         return
 
-    response = requests.head(final_url, headers=headers, allow_redirects=True)
+    response = get_session().head(final_url, headers=headers, allow_redirects=True)
     response.raise_for_status()
     file_size = int(response.headers.get("Content-Length", 0))
 
@@ -219,6 +227,8 @@ def download_file(
         info["size"] for info in meta_data.values() if info.get("status") == "done"
     )
 
+    from tqdm import tqdm
+
     progress_bar = tqdm(
         total=file_size,
         initial=completed_bytes,
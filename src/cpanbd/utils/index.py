@@ -0,0 +1,347 @@
+"""网盘目录的本地 SQLite 索引
+
+把网盘中的文件信息 (path, fs_id, size, md5, mtime, isdir) 保存到本地 SQLite 中,
+查询路径、判断是否存在、统计目录大小都在本地完成, 不再调用受限速的接口.
+
+- `crawl`: 通过 `listall(recursion=1)` 全量抓取某个目录
+- `refresh`: 通过 `listall` 的 mtime/ctime 参数, 只抓取上次抓取之后新增或修改的文件
+
+!!! note "注意"
+    增量刷新只能发现新增和修改的文件, 网盘中删除的文件需要重新 `crawl` 才会从索引中移除.
+
+```python
+from cpanbd import File
+from cpanbd.utils.index import RemoteIndex
+
+with RemoteIndex("panbd.db", File()) as index:
+    index.refresh("/我的资源")  # 第一次为全量抓取, 之后为增量
+    print(index.exists("/我的资源/a.pdf"))
+    print(index.du("/我的资源"))
+```
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Union
+
+if TYPE_CHECKING:
+    from ..file import File
+
+COLUMNS = ("path", "parent", "name", "fs_id", "size", "md5", "mtime", "ctime", "isdir")
+
+_ENTRY_COLUMNS = """(
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fs_id INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    md5 TEXT,
+    mtime INTEGER NOT NULL DEFAULT 0,
+    ctime INTEGER NOT NULL DEFAULT 0,
+    isdir INTEGER NOT NULL DEFAULT 0
+)"""
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS entries {_ENTRY_COLUMNS};
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+CREATE INDEX IF NOT EXISTS entries_fs_id ON entries (fs_id);
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL DEFAULT 0,
+    ctime INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def _normpath(path: str) -> str:
+    assert path.startswith("/"), "❌ 网盘路径必须以 / 开头"
+    return path.rstrip("/") or "/"
+
+
+def _subtree(path: str) -> tuple[str, str]:
+    """path 下所有子孙路径的区间 [lo, hi), 可以走主键索引"""
+    prefix = "/" if path == "/" else path + "/"
+    return prefix, prefix[:-1] + chr(ord("/") + 1)
+
+
+def _row(item: dict[str, Any]) -> tuple:
+    path = item["path"]
+    return (
+        path,
+        str(PurePosixPath(path).parent),
+        item.get("server_filename") or PurePosixPath(path).name,
+        int(item["fs_id"]),
+        int(item.get("size") or 0),
+        item.get("md5"),
+        int(item.get("server_mtime") or 0),
+        int(item.get("server_ctime") or 0),
+        int(item.get("isdir") or 0),
+    )
+
+
+class RemoteIndex:
+    """网盘文件信息的本地索引, 线程安全
+
+    Attributes:
+        db_path (str): SQLite 数据库文件路径, 默认为 `:memory:` (只在内存中)
+        file (File): 用于抓取的 File 对象, 只查询本地索引时可以不传
+        page_size (int): 每次 `listall` 的数量, 最大1000
+        overlap (int): 增量刷新时多往前查询的秒数, 避免同一秒内修改的文件被漏掉
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = ":memory:",
+        file: Optional["File"] = None,
+        page_size: int = 1000,
+        overlap: int = 2,
+    ) -> None:
+        self.db_path = str(db_path)
+        self.file = file
+        self.page_size = page_size
+        self.overlap = max(0, overlap)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            if self.db_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ---------- 抓取 ----------
+
+    def _require_file(self) -> "File":
+        if self.file is None:
+            from ..file import File
+
+            self.file = File()
+        return self.file
+
+    def _ingest(
+        self,
+        items: Iterable[dict[str, Any]],
+        batch: int = 1000,
+        table: str = "entries",
+    ) -> tuple:
+        """写入文件信息, 返回 (写入数量, 最大 mtime, 最大 ctime)"""
+        count, max_mtime, max_ctime = 0, 0, 0
+        rows: list[tuple] = []
+
+        def flush() -> None:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    rows,
+                )
+            rows.clear()
+
+        for item in items:
+            row = _row(item)
+            rows.append(row)
+            count += 1
+            max_mtime = max(max_mtime, row[6])
+            max_ctime = max(max_ctime, row[7])
+            if len(rows) >= batch:
+                flush()
+        if rows:
+            flush()
+        return count, max_mtime, max_ctime
+
+    def _save_root(self, root: str, mtime: int, ctime: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO roots (root, mtime, ctime, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(root) DO UPDATE SET mtime = max(mtime, excluded.mtime), "
+                "ctime = max(ctime, excluded.ctime), updated_at = excluded.updated_at",
+                (root, mtime, ctime, time.time()),
+            )
+
+    def crawl(self, root: str = "/") -> int:
+        """全量抓取 root 目录(含递归), 替换索引中 root 下原有的内容
+
+        先写入临时表, 全部抓取成功后在一个事务中替换; 抓取出错时索引保持不变.
+
+        Args:
+            root (str): 网盘目录, 必须/开头
+
+        Returns:
+            int: 抓取到的文件和文件夹数量
+        """
+        root = _normpath(root)
+        file = self._require_file()
+        lo, hi = _subtree(root)
+        staging = f"staging_{threading.get_ident()}_{time.monotonic_ns()}"
+        with self._lock, self._conn:
+            self._conn.execute(f"CREATE TEMP TABLE {staging} {_ENTRY_COLUMNS}")
+        try:
+            count, max_mtime, max_ctime = self._ingest(
+                file.iter_listall(root, recursion=1, page_size=self.page_size, web=0),
+                table=staging,
+            )
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE path >= ? AND path < ?", (lo, hi)
+                )
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO entries SELECT * FROM {staging}"
+                )
+                self._conn.execute("DELETE FROM roots WHERE root = ?", (root,))
+                self._conn.execute(
+                    "INSERT INTO roots (root, mtime, ctime, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (root, max_mtime, max_ctime, time.time()),
+                )
+        finally:
+            with self._lock, self._conn:
+                self._conn.execute(f"DROP TABLE IF EXISTS {staging}")
+        return count
+
+    def _unchanged(self, item: dict[str, Any]) -> bool:
+        """索引中已有相同的记录 (overlap 区间内重复返回的文件)"""
+        row = _row(item)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT fs_id, size, md5, mtime, ctime FROM entries WHERE path = ?",
+                (row[0],),
+            ).fetchone()
+        return old is not None and tuple(old) == (
+            row[3],
+            row[4],
+            row[5],
+            row[6],
+            row[7],
+        )
+
+    def refresh(self, root: str = "/") -> int:
+        """增量刷新 root 目录, 只抓取上次抓取之后修改(mtime)或上传(ctime)的文件
+
+        每次多往前查询 `overlap` 秒, 上次抓取时同一秒内稍后修改的文件也能被发现;
+        重复返回且没有变化的文件不计入数量. root 从未抓取过时, 等同于 `crawl`.
+
+        Args:
+            root (str): 网盘目录, 必须/开头
+
+        Returns:
+            int: 新增或更新的文件和文件夹数量
+        """
+        root = _normpath(root)
+        with self._lock:
+            mark = self._conn.execute(
+                "SELECT mtime, ctime FROM roots WHERE root = ?", (root,)
+            ).fetchone()
+        if mark is None:
+            return self.crawl(root)
+
+        file = self._require_file()
+        changed: dict[str, dict[str, Any]] = {}
+        for key in ("mtime", "ctime"):
+            for item in file.iter_listall(
+                root,
+                recursion=1,
+                page_size=self.page_size,
+                web=0,
+                **{key: max(0, mark[key] - self.overlap)},
+            ):
+                changed[item["path"]] = item
+        items = [item for item in changed.values() if not self._unchanged(item)]
+        total, max_mtime, max_ctime = self._ingest(items)
+        self._save_root(root, max_mtime, max_ctime)
+        return total
+
+    def add(self, items: Iterable[dict[str, Any]]) -> int:
+        """手动写入文件信息 (比如 `list_files`、`search` 的结果)"""
+        return self._ingest(items)[0]
+
+    def remove(self, path: str) -> int:
+        """从索引中删除 path 及其子孙, 返回删除的数量"""
+        path = _normpath(path)
+        lo, hi = _subtree(path)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)",
+                (path, lo, hi),
+            )
+        return cur.rowcount
+
+    # ---------- 查询 ----------
+
+    def lookup(self, path: str) -> Optional[dict[str, Any]]:
+        """查询单个路径, 不存在时返回 None
+
+        Returns:
+            dict: path, parent, name, fs_id, size, md5, mtime, ctime, isdir;
+                md5 与接口返回的一致(未解密), 需要时用 `decrypt_md5` 转换
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM entries WHERE path = ?", (_normpath(path),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def lookup_fs_id(self, fs_id: int) -> Optional[dict[str, Any]]:
+        """按 fs_id 查询, 不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM entries WHERE fs_id = ?", (int(fs_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def exists(self, path: str) -> bool:
+        """路径是否存在"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM entries WHERE path = ?", (_normpath(path),)
+            ).fetchone()
+        return row is not None
+
+    def listdir(self, path: str = "/") -> list[dict[str, Any]]:
+        """列出目录下的文件和文件夹 (不递归)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM entries WHERE parent = ? ORDER BY name",
+                (_normpath(path),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def du(self, path: str = "/") -> int:
+        """path 下所有文件的总大小(字节), path 为文件时返回该文件的大小"""
+        path = _normpath(path)
+        lo, hi = _subtree(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries "
+                "WHERE isdir = 0 AND (path = ? OR (path >= ? AND path < ?))",
+                (path, lo, hi),
+            ).fetchone()
+        return int(row[0])
+
+    def count(self, path: str = "/", isdir: Optional[int] = None) -> int:
+        """path 下(含递归)的文件和文件夹数量, isdir 为 0/1 时只统计文件/文件夹"""
+        path = _normpath(path)
+        lo, hi = _subtree(path)
+        sql = "SELECT COUNT(*) FROM entries WHERE path >= ? AND path < ?"
+        args: tuple = (lo, hi)
+        if isdir is not None:
+            sql += " AND isdir = ?"
+            args += (int(isdir),)
+        with self._lock:
+            return int(self._conn.execute(sql, args).fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "RemoteIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+__all__ = [
+    "RemoteIndex",
+]
@@ -0,0 +1,154 @@
+"""可断点续传的上传记录
+
+`upload_file` 分片上传时, 把 uploadid、分片 md5 列表、上传服务器和已完成的分片序号写入
+`<文件名>.bdupload.json` (或 `state_dir` 目录下). 上传中断后再次上传同一个文件时:
+
+- 文件大小、修改时间、分片大小和网盘路径都没变, 且 uploadid 还在有效期内时, 不再计算 md5,
+  只上传还没完成的分片
+- 否则重新预创建, 覆盖旧的记录
+
+上传成功后删除记录.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from pydantic import Field, dataclasses
+
+JOURNAL_SUFFIX = ".bdupload.json"
+JOURNAL_VERSION = 1
+UPLOAD_SESSION_TTL = 24 * 3600  # uploadid 的有效期(秒), 超过后重新预创建
+SAVE_INTERVAL = 5.0  # 上传过程中最多每隔多少秒写一次记录
+
+
+def journal_path(file_path: Path | str, state_dir: Optional[Path | str] = None) -> Path:
+    """上传记录的保存位置
+
+    Args:
+        file_path (Path | str): 本地文件路径
+        state_dir (Path | str): 保存记录的目录, 为 None 时保存在本地文件旁边
+    """
+    file_path = Path(file_path).resolve()
+    if state_dir is None:
+        return file_path.with_name(file_path.name + JOURNAL_SUFFIX)
+    # 不同目录下的同名文件不能共用一份记录
+    key = hashlib.md5(str(file_path).encode("utf-8")).hexdigest()[:16]
+    return Path(state_dir) / f"{file_path.name}.{key}{JOURNAL_SUFFIX}"
+
+
+@dataclasses.dataclass
+class UploadJournal:
+    """
+    一次分片上传的记录
+
+    Attributes:
+        upload_path (str): 网盘路径
+        size (int): 本地文件大小
+        mtime_ns (int): 本地文件修改时间, 用于判断文件是否变化
+        block_size (int): 分片大小
+        content_md5 (str): 整个文件的 md5 (已经过 encrypt_md5)
+        slice_md5 (str): 文件前 256KB 的 md5
+        block_list (list[str]): 每个分片的 md5
+        uploadid (str): 预创建返回的上传ID
+        server (str): 上传服务器
+        created_at (float): 预创建的时间戳
+        done (list[int]): 已完成的分片序号
+    """
+
+    upload_path: str
+    size: int
+    mtime_ns: int
+    block_size: int
+    content_md5: str
+    slice_md5: str
+    block_list: list[str]
+    uploadid: str = ""
+    server: str = ""
+    created_at: float = 0.0
+    done: list[int] = Field(default_factory=list)
+    version: int = JOURNAL_VERSION
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["UploadJournal"]:
+        """读取记录, 不存在或已损坏时返回 None"""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            journal = cls(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ 上传记录已损坏, 忽略: {path}, {e}")
+            return None
+        if journal.version != JOURNAL_VERSION:
+            return None
+        return journal
+
+    def matches(
+        self, upload_path: str, size: int, mtime_ns: int, block_size: int
+    ) -> bool:
+        """是否为同一个文件上传到同一个位置, 且 uploadid 还在有效期内"""
+        return (
+            self.upload_path == upload_path
+            and self.size == size
+            and self.mtime_ns == mtime_ns
+            and self.block_size == block_size
+            and bool(self.uploadid)
+            and time.time() - self.created_at < UPLOAD_SESSION_TTL
+        )
+
+    def save(self, path: Path) -> None:
+        """先写临时文件再替换, 中途退出也不会留下不完整的记录"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self)), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class JournalWriter:
+    """多线程上传时记录已完成的分片, 按 `SAVE_INTERVAL` 限制写盘次数"""
+
+    def __init__(self, journal: UploadJournal, path: Optional[Path]) -> None:
+        self.journal = journal
+        self.path = path
+        self._done = set(journal.done)
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def mark_done(self, idx: int) -> None:
+        with self._lock:
+            self._done.add(idx)
+            if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+                self._save()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save()
+
+    def remove(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.journal.done = sorted(self._done)
+        try:
+            self.journal.save(self.path)
+        except OSError as e:
+            print(f"⚠️ 保存上传记录失败: {self.path}, {e}")
+        self._saved_at = time.monotonic()
+
+
+__all__ = [
+    "JOURNAL_SUFFIX",
+    "UPLOAD_SESSION_TTL",
+    "JournalWriter",
+    "UploadJournal",
+    "journal_path",
+]
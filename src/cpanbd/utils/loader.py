@@ -0,0 +1,137 @@
+"""filemetas 批量查询
+
+`File.filemetas` 一次最多可以查询 100 个 fs_id. `FilemetasLoader` 把任意多个调用方(可以在不同线程)
+对单个 fs_id 的查询收集起来, 凑满 100 个(或等待 `wait` 秒)后合并成一次请求, 再把结果分别交给各自的调用方.
+
+```python
+from cpanbd import File
+from cpanbd.utils.loader import FilemetasLoader
+
+file = File()
+with FilemetasLoader(file, dlink=1) as loader:
+    futures = loader.load_many([fs_id1, fs_id2, fs_id3])
+    metas = [f.result() for f in futures]  # 每一项为该文件的 meta 信息, 不存在时为 None
+```
+"""
+
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+if TYPE_CHECKING:
+    from ..file import File
+
+MAX_BATCH_SIZE = 100  # filemetas 接口 fsids 的上限
+
+
+class FilemetasLoader:
+    """DataLoader 风格的 filemetas 批量查询, 线程安全
+
+    Attributes:
+        file (File): File 对象
+        batch_size (int): 每次请求的 fs_id 数量, 最大 100
+        wait (float): 未凑满一批时, 最多等待的秒数
+        cache (bool): 同一个 fs_id 是否复用之前的结果
+        params (dict): 其他传给 `File.filemetas` 的参数, 如 dlink、thumb 等
+    """
+
+    def __init__(
+        self,
+        file: "File",
+        batch_size: int = MAX_BATCH_SIZE,
+        wait: float = 0.01,
+        max_workers: int = 4,
+        cache: bool = True,
+        **params: Any,
+    ) -> None:
+        self.file = file
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.wait = wait
+        self.cache = cache
+        self.params = params
+        self._lock = threading.Lock()
+        self._pending: dict[int, Future] = {}
+        self._cached: dict[int, Future] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def load(self, fs_id: int) -> Future:
+        """查询单个文件, 返回 Future, 结果为该文件的 meta 信息(dict), 不存在时为 None"""
+        fs_id = int(fs_id)
+        batch = None
+        with self._lock:
+            future = self._cached.get(fs_id) or self._pending.get(fs_id)
+            if future is not None:
+                return future
+            future = Future()
+            self._pending[fs_id] = future
+            if self.cache:
+                self._cached[fs_id] = future
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._executor.submit(self._run, batch)
+        return future
+
+    def load_many(self, fs_ids: Iterable[int]) -> list[Future]:
+        """查询多个文件, 返回与 fs_ids 一一对应的 Future 列表"""
+        futures = [self.load(fs_id) for fs_id in fs_ids]
+        self.flush()
+        return futures
+
+    def flush(self) -> None:
+        """立即发送所有未凑满一批的查询"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._executor.submit(self._run, batch)
+
+    def clear(self) -> None:
+        """清空已缓存的结果 (比如 dlink 过期后)"""
+        with self._lock:
+            self._cached.clear()
+
+    def close(self) -> None:
+        """发送剩余查询并等待全部完成"""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "FilemetasLoader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _take(self) -> dict[int, Future]:
+        # 调用方需持有 self._lock
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        return batch
+
+    def _run(self, batch: dict[int, Future]) -> None:
+        try:
+            res = self.file.filemetas(fsids=json.dumps(list(batch)), **self.params)
+        except Exception as e:
+            with self._lock:
+                for fs_id in batch:
+                    self._cached.pop(fs_id, None)
+            for future in batch.values():
+                future.set_exception(e)
+            return
+
+        metas = {item.get("fs_id"): item for item in (res or {}).get("list") or []}
+        for fs_id, future in batch.items():
+            future.set_result(metas.get(fs_id))
+
+
+__all__ = [
+    "MAX_BATCH_SIZE",
+    "FilemetasLoader",
+]
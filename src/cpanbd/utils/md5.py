@@ -1,7 +1,24 @@
 import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from pydantic import dataclasses
+
+HASH_BUFFER_SIZE = 1024 * 1024  # 每次读取 1MB
+SLICE_SIZE = 256 * 1024  # 校验段为文件前 256KB
+
+
+def _read_full(f, view: memoryview) -> int:
+    """读满 view (到文件末尾时除外), 返回读取的字节数"""
+    total = 0
+    while total < len(view):
+        n = f.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
 
 def calculate_md5(file_path: Path | str) -> str:
     file_path = Path(file_path)
@@ -9,12 +26,88 @@ def calculate_md5(file_path: Path | str) -> str:
     assert file_path.is_file(), f"路径不是文件: {file_path}"
 
     hash_md5 = hashlib.md5()
-    with file_path.open("rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
+    buffer = memoryview(bytearray(HASH_BUFFER_SIZE))
+    with file_path.open("rb", buffering=0) as f:
+        while n := _read_full(f, buffer):
+            hash_md5.update(buffer[:n])
     return hash_md5.hexdigest()
 
 
+@dataclasses.dataclass
+class FileHashes:
+    """
+    上传文件需要的全部 md5
+
+    Attributes:
+        size (int): 文件大小
+        md5 (str): 整个文件的 md5, 32位小写
+        slice_md5 (str): 文件前 256KB 的 md5
+        block_list (list[str]): 每个分片的 md5
+        block_size (int): 分片大小
+    """
+
+    size: int
+    md5: str
+    slice_md5: str
+    block_list: list[str]
+    block_size: int
+
+
+def _block_md5(chunk: memoryview) -> str:
+    return hashlib.md5(chunk).hexdigest()
+
+
+def hash_file(file_path: Path | str, block_size: int = 4 * 1024 * 1024) -> FileHashes:
+    """顺序读取一次文件, 同时计算整个文件的 md5、前 256KB 的 md5 和每个分片的 md5
+
+    使用两个分片大小的缓冲区轮流读取: 读取下一个分片的同时, 在线程中计算上一个分片的 md5
+    (hashlib 计算时会释放 GIL), 整个文件的 md5 和分片的 md5 也同时计算.
+
+    Args:
+        file_path (Path | str): 文件路径
+        block_size (int): 分片大小, 默认为 4MB
+
+    Returns:
+        FileHashes: 计算结果
+    """
+    file_path = Path(file_path)
+    if not file_path.is_file():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+
+    whole = hashlib.md5()
+    head = hashlib.md5()  # 前 256KB, 分片比 256KB 小时跨多个分片
+    blocks: list[Future] = []
+    size = 0
+    buffers = [memoryview(bytearray(block_size)) for _ in range(2)]
+    pending: list[Future] = []
+    with (
+        file_path.open("rb", buffering=0) as f,
+        ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        while n := _read_full(f, buffers[len(blocks) % 2]):
+            chunk = buffers[len(blocks) % 2][:n]
+            if size < SLICE_SIZE:
+                head.update(chunk[: SLICE_SIZE - size])
+            # 上一个分片算完后, 才能继续更新整个文件的 md5, 它的缓冲区也才能复用
+            for future in pending:
+                future.result()
+            blocks.append(executor.submit(_block_md5, chunk))
+            pending = [executor.submit(whole.update, chunk), blocks[-1]]
+            size += n
+        for future in pending:
+            future.result()
+    slice_md5 = head.hexdigest()
+    # 空文件的分片列表为空文件的 md5
+    block_list = [future.result() for future in blocks] or [slice_md5]
+    return FileHashes(
+        size=size,
+        md5=whole.hexdigest(),
+        slice_md5=slice_md5,
+        block_list=block_list,
+        block_size=block_size,
+    )
+
+
 def get_file_md5_blocks(file_path, block_size=32 * 1024 * 1024):
     file_path = Path(file_path)
     if not file_path.exists():
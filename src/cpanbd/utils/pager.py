@@ -0,0 +1,48 @@
+"""并发预取的分页迭代
+
+按页码(page/num)或偏移量(start/limit)分页的接口, 每一页的请求参数都可以提前算出来,
+所以可以同时请求后面的 `depth` 页, 再按顺序返回. 遇到最后一页(不满一页或 has_more=0)时停止,
+已经提交的多余请求会被取消或丢弃.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+# fetch(页码或偏移量) -> (这一页的数据, 是否为最后一页)
+PageFetcher = Callable[[int], tuple[list[Any], bool]]
+
+
+def iter_pages(
+    fetch: PageFetcher, first: int = 1, step: int = 1, depth: int = 4
+) -> Iterator[list[Any]]:
+    """按顺序返回每一页的数据, 同时最多有 `depth` 页在请求中
+
+    Args:
+        fetch (Callable): 请求一页, 参数为页码或偏移量, 返回 (数据, 是否为最后一页)
+        first (int): 第一页的页码或偏移量
+        step (int): 相邻两页页码或偏移量的差, 按页码分页时为 1, 按偏移量分页时为每页数量
+        depth (int): 预取深度, 为 1 时逐页请求
+    """
+    depth = max(1, depth)
+    executor = ThreadPoolExecutor(max_workers=depth)
+    pending: deque[Future] = deque()
+    position = first
+    try:
+        while True:
+            while len(pending) < depth:
+                pending.append(executor.submit(fetch, position))
+                position += step
+            items, last = pending.popleft().result()
+            if items:
+                yield items
+            if last or not items:
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = [
+    "PageFetcher",
+    "iter_pages",
+]
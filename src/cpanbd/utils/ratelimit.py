@@ -0,0 +1,159 @@
+"""进程内共享的自适应限速器
+
+百度网盘触发风控时会返回 errno 31034. 以前每个线程各自 `sleep(3)` 后重试, 多个线程会一起撞上风控.
+这里按接口类别维护进程内共享的限速器 (令牌桶 + AIMD):
+
+- `meta`: 普通接口 (文件列表、文件信息、创建文件等)
+- `upload`: 分片上传 (superfile2)
+- `download`: 文件下载
+
+每次请求前先取令牌; 请求成功后速率缓慢线性增加, 遇到 31034 时速率减半, 并让同类请求一起暂停一段时间.
+
+```python
+from cpanbd.utils.ratelimit import configure_limiter
+
+# 调整普通接口的初始速率和上限 (每秒请求数)
+configure_limiter("meta", rate=5, max_rate=20)
+```
+"""
+
+import asyncio
+import threading
+import time
+from typing import Literal
+
+RateClass = Literal["meta", "upload", "download"]
+
+# 各类接口的默认参数: 初始速率、最小速率、最大速率(每秒请求数), 突发请求数
+DEFAULT_LIMITS: dict[str, dict[str, float]] = {
+    "meta": {"rate": 20.0, "min_rate": 0.5, "max_rate": 100.0, "burst": 20},
+    "upload": {"rate": 20.0, "min_rate": 0.5, "max_rate": 100.0, "burst": 16},
+    "download": {"rate": 50.0, "min_rate": 1.0, "max_rate": 200.0, "burst": 16},
+}
+
+
+class AdaptiveRateLimiter:
+    """令牌桶限速器, 速率按 AIMD (加性增、乘性减) 调整, 线程安全
+
+    Attributes:
+        rate (float): 当前速率, 每秒请求数
+        min_rate (float): 最小速率
+        max_rate (float): 最大速率
+        burst (int): 允许的突发请求数
+        increase (float): 每秒成功请求后速率增加的量
+        decrease (float): 触发风控时速率乘以的系数
+        cooldown (float): 触发风控后暂停的秒数
+    """
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        burst: float = 20,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 3.0,
+    ) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1, int(burst))
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._tat = 0.0  # 理论到达时间 (GCRA)
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+
+    def reserve(self) -> float:
+        """预定一个令牌, 返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self.rate
+            start = max(now, self._paused_until)
+            tat = max(self._tat, start)
+            allowed_at = max(start, tat - (self.burst - 1) * interval)
+            self._tat = tat + interval
+            return allowed_at - now
+
+    def acquire(self) -> None:
+        """取得一个令牌 (必要时阻塞等待)"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """`acquire` 的异步版本"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """请求成功: 速率线性增加, 大约每秒增加 `increase`"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self) -> None:
+        """触发风控: 速率减半, 同类请求一起暂停 `cooldown` 秒
+
+        同一个冷却期内多个线程同时报告风控, 速率只降低一次.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._paused_until = max(self._paused_until, now + self.cooldown)
+            self._tat = self._paused_until
+
+
+_limiters: dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(kind: RateClass = "meta") -> AdaptiveRateLimiter:
+    """获取某类接口共享的限速器
+
+    Args:
+        kind (str): meta, upload 或 download
+    """
+    limiter = _limiters.get(kind)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(kind)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(**DEFAULT_LIMITS[kind])
+                _limiters[kind] = limiter
+    return limiter
+
+
+def configure_limiter(kind: RateClass, **kwargs: float) -> AdaptiveRateLimiter:
+    """替换某类接口的限速器
+
+    Args:
+        kind (str): meta, upload 或 download
+        **kwargs: `AdaptiveRateLimiter` 的参数, 未指定的使用默认值
+    """
+    limiter = AdaptiveRateLimiter(**{**DEFAULT_LIMITS[kind], **kwargs})
+    with _limiters_lock:
+        _limiters[kind] = limiter
+    return limiter
+
+
+def classify_url(url: str) -> RateClass:
+    """根据请求地址判断接口类别"""
+    if "superfile2" in url:
+        return "upload"
+    return "meta"
+
+
+__all__ = [
+    "DEFAULT_LIMITS",
+    "AdaptiveRateLimiter",
+    "RateClass",
+    "classify_url",
+    "configure_limiter",
+    "get_limiter",
+]
@@ -0,0 +1,185 @@
+"""网盘路径 -> 文件信息 (fs_id/size/md5) 的缓存解析
+
+单文件操作 (下载、秒传等) 需要先根据路径找到文件的 fs_id 和 md5. `PathResolver` 按目录缓存
+`list_files` 的结果, 同一目录下的其他文件直接从缓存中查找; 目录很大时按页请求,
+找到目标文件就停止, 下次从停下的位置继续翻页. 缓存中找不到的文件, 有效期内最多重新列一次
+目录再确认. 缓存超过 `ttl` 秒后失效.
+
+```python
+from cpanbd.utils.resolver import get_resolver
+
+resolver = get_resolver()
+info = resolver.resolve("/我的资源/a.pdf")  # 不存在时为 None
+print(info["fs_id"], info["size"], info["md5"])
+```
+"""
+
+import threading
+import time
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Any, Optional
+
+from .walker import LIST_FILES_MAX_LIMIT
+
+if TYPE_CHECKING:
+    from ..file import File
+
+DEFAULT_TTL = 300.0  # 目录缓存的有效期(秒)
+
+
+class _DirCache:
+    """单个目录已获取的页"""
+
+    __slots__ = ("entries", "next_start", "complete", "relisted", "expires_at", "lock")
+
+    def __init__(self, ttl: float) -> None:
+        self.entries: dict[str, dict[str, Any]] = {}  # 文件名 -> 文件信息
+        self.next_start = 0
+        self.complete = False
+        self.relisted = False  # 未命中后已重新列过, 有效期内不再重新列
+        self.expires_at = time.monotonic() + ttl
+        self.lock = threading.Lock()
+
+    def replace(self, other: "_DirCache") -> None:
+        """用重新列出的结果替换, 保留原来的锁"""
+        self.entries = other.entries
+        self.next_start = other.next_start
+        self.complete = other.complete
+        self.relisted = other.relisted
+        self.expires_at = other.expires_at
+
+
+class PathResolver:
+    """带 TTL 缓存的路径解析, 线程安全
+
+    Attributes:
+        file (File): File 对象
+        ttl (float): 目录缓存的有效期(秒), 默认300
+        page_size (int): 每次 `list_files` 的数量, 最大1000
+    """
+
+    def __init__(
+        self,
+        file: Optional["File"] = None,
+        ttl: float = DEFAULT_TTL,
+        page_size: int = LIST_FILES_MAX_LIMIT,
+    ) -> None:
+        if file is None:
+            from ..file import File
+
+            file = File()
+        self.file = file
+        self.ttl = ttl
+        self.page_size = max(1, min(page_size, LIST_FILES_MAX_LIMIT))
+        self._lock = threading.Lock()
+        self._dirs: dict[str, _DirCache] = {}
+
+    def _dir_cache(self, dirpath: str) -> _DirCache:
+        with self._lock:
+            cache = self._dirs.get(dirpath)
+            if cache is None or cache.expires_at <= time.monotonic():
+                cache = _DirCache(self.ttl)
+                self._dirs[dirpath] = cache
+            return cache
+
+    def _fetch_page(self, dirpath: str, cache: _DirCache) -> None:
+        # 调用方需持有 cache.lock
+        res = self.file.list_files(
+            dir=dirpath,
+            order="name",
+            desc=0,
+            start=cache.next_start,
+            limit=self.page_size,
+            web=0,
+        )
+        if not res or "list" not in res:
+            raise ValueError(f"❌ 获取文件列表失败: {dirpath}, {res}")
+        for item in res["list"]:
+            name = item.get("server_filename") or PurePosixPath(item["path"]).name
+            cache.entries[name] = item
+        cache.next_start += len(res["list"])
+        if len(res["list"]) < self.page_size:
+            cache.complete = True
+
+    def resolve(self, path: str) -> Optional[dict[str, Any]]:
+        """根据路径获取文件(或文件夹)信息, 不存在时返回 None
+
+        Args:
+            path (str): 网盘路径, 必须/开头
+
+        Returns:
+            dict: `list_files` 返回的文件信息, 含 fs_id、size、md5 (未解密)、isdir 等
+
+        Raises:
+            ValueError: 获取文件列表失败
+        """
+        assert path.startswith("/"), "❌ 网盘路径必须以 / 开头"
+        p = PurePosixPath(path)
+        dirpath, name = str(p.parent), p.name
+        if not name:
+            return None  # 根目录
+        cache = self._dir_cache(dirpath)
+        with cache.lock:
+            # 这次调用从第一页开始列, 结果都是最新的
+            from_scratch = cache.next_start == 0 and not cache.complete
+            self._fill(dirpath, cache, name)
+            item = cache.entries.get(name)
+            if item is not None or from_scratch or cache.relisted:
+                return item
+            # 缓存中没有时可能是缓存之后才上传/移动过来的, 有效期内最多重新列一次;
+            # 重新列失败时保留原来的缓存
+            fresh = _DirCache(self.ttl)
+            fresh.relisted = True
+            self._fill(dirpath, fresh, name)
+            cache.replace(fresh)
+            return cache.entries.get(name)
+
+    def _fill(self, dirpath: str, cache: _DirCache, name: str) -> None:
+        """翻页直到找到 name 或列完整个目录
+
+        服务端按名称排序的规则不确定 (自然数、拼音等), 不能根据已列出的文件名提前停止.
+        """
+        while name not in cache.entries and not cache.complete:
+            self._fetch_page(dirpath, cache)
+
+    def listdir(self, dirpath: str) -> list[dict[str, Any]]:
+        """列出目录下的全部文件和文件夹 (使用并补全缓存)"""
+        dirpath = dirpath.rstrip("/") or "/"
+        cache = self._dir_cache(dirpath)
+        with cache.lock:
+            while not cache.complete:
+                self._fetch_page(dirpath, cache)
+            return list(cache.entries.values())
+
+    def invalidate(self, dirpath: Optional[str] = None) -> None:
+        """清除缓存 (上传、删除、重命名之后调用)
+
+        Args:
+            dirpath (str): 要清除的目录, 为 None 时清除全部
+        """
+        with self._lock:
+            if dirpath is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(dirpath.rstrip("/") or "/", None)
+
+
+_shared_resolver: Optional[PathResolver] = None
+_shared_lock = threading.Lock()
+
+
+def get_resolver() -> PathResolver:
+    """获取进程内共享的 PathResolver (第一次调用时创建)"""
+    global _shared_resolver
+    if _shared_resolver is None:
+        with _shared_lock:
+            if _shared_resolver is None:
+                _shared_resolver = PathResolver()
+    return _shared_resolver
+
+
+__all__ = [
+    "DEFAULT_TTL",
+    "PathResolver",
+    "get_resolver",
+]
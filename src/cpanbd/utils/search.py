@@ -0,0 +1,134 @@
+"""多关键字、多目录并发搜索
+
+`File.search` 一次只能搜索一个关键字、一个目录, 每页最多 500 项. `search_many` 把
+(关键字, 目录) 的每个组合分给线程池并发搜索, 每个组合按 page 翻页直到 has_more=0,
+结果按 fs_id 去重, 边搜索边返回.
+
+```python
+from cpanbd import File
+from cpanbd.utils.search import search_many
+
+file = File()
+for item in search_many(file, ["python", "java"], ["/书籍", "/资料"], recursion=1):
+    print(item["path"])
+```
+
+!!! note "提示"
+    按完整路径查找文件 (如 `baiduTo123`) 时, `PathResolver` 按目录缓存文件列表, 比搜索更快.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    from ..file import File
+
+_DONE = object()  # 单个搜索任务结束的标记
+
+
+def _as_list(value: Union[str, Iterable[str]]) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def search_many(
+    file: "File",
+    keys: Union[str, Iterable[str]],
+    dirs: Union[str, Iterable[str]] = "/",
+    recursion: int = 1,
+    category: Optional[int] = None,
+    max_workers: int = 8,
+    max_pages: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[dict[str, Any]]:
+    """并发搜索多个关键字、多个目录, 按 fs_id 去重, 边搜索边返回
+
+    Args:
+        file (File): File 对象
+        keys (str | Iterable[str]): 一个或多个关键字
+        dirs (str | Iterable[str]): 一个或多个目录, 必须/开头, 默认为 /
+        recursion (int): 是否递归, 默认为1
+        category (int): 文件类型, 为 None 时不限类型
+        max_workers (int): 最大并发数, 默认为8
+        max_pages (int): 每个组合最多请求的页数, 为 None 时不限制
+        **kwargs: 其他 `search` 参数, 如 web
+
+    Yields:
+        dict: `search` 返回的文件信息, 同一个 fs_id (没有 fs_id 时为 path) 只返回一次
+
+    Raises:
+        ValueError: 搜索失败
+    """
+    tasks = list(product(_as_list(keys), _as_list(dirs)))
+    if not tasks:
+        return
+    kwargs.setdefault("web", 0)
+    results: queue.Queue = queue.Queue(maxsize=max(1, max_workers) * 2)
+    stop = threading.Event()
+
+    def put(value: Any) -> bool:
+        # 调用方提前结束时, 不再阻塞在队列上
+        while not stop.is_set():
+            try:
+                results.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(key: str, dir: str) -> None:
+        page = 1
+        try:
+            while not stop.is_set():
+                res = file.search(
+                    key=key,
+                    dir=dir,
+                    category=category,
+                    recursion=recursion,
+                    page=page,
+                    **kwargs,
+                )
+                if not res or "list" not in res:
+                    raise ValueError(f"❌ 搜索失败: key={key}, dir={dir}, {res}")
+                if res["list"] and not put(res["list"]):
+                    return
+                if res.get("has_more") != 1 or (max_pages and page >= max_pages):
+                    break
+                page += 1
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    seen: set[int | str] = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        for key, dir in tasks:
+            executor.submit(run, key, dir)
+        remaining = len(tasks)
+        while remaining:
+            value = results.get()
+            if value is _DONE:
+                remaining -= 1
+            elif isinstance(value, Exception):
+                raise value
+            else:
+                for item in value:
+                    # 没有 fs_id 时按路径去重
+                    ident = item.get("fs_id")
+                    if ident is None:
+                        ident = item.get("path")
+                    if ident in seen:
+                        continue
+                    seen.add(ident)
+                    yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = [
+    "search_many",
+]
@@ -0,0 +1,154 @@
+"""共享的 HTTP 会话层
+
+所有请求 (API 调用、分片上传、文件下载) 都通过这里拿到 `requests.Session`,
+以复用 TCP/TLS 连接, 避免每次请求都重新握手.
+
+- 连接池由一个进程级的 `HTTPAdapter` 持有, 按 host 分池 (pan.baidu.com, *.pcs.baidu.com 等)
+- `requests.Session` 本身不保证线程安全, 所以每个线程持有自己的 Session, 但它们挂载的是同一个 adapter, 共享同一组连接池
+- 默认开启 keep-alive
+
+```python
+from cpanbd.utils.session import configure_session
+
+# 并发较高时, 调大每个 host 的连接数
+configure_session(pool_connections=32, pool_maxsize=64)
+```
+
+异步接口使用 `httpx.AsyncClient` (需要 `pip install "cpanbd[aio]"`), 每个事件循环一个, 连接数同样由
+`configure_session` 的 `pool_maxsize` 控制.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 16  # 缓存的 host 连接池个数
+DEFAULT_POOL_MAXSIZE = 32  # 每个 host 连接池的最大连接数
+DEFAULT_ASYNC_TIMEOUT = 120.0  # 异步请求的超时时间(秒)
+AIO_IMPORT_ERROR = '❌ 异步接口依赖 httpx, 请先安装 `pip install "cpanbd[aio]"`'
+
+_lock = threading.RLock()
+_local = threading.local()
+_adapter: Optional[HTTPAdapter] = None
+_keep_alive: bool = True
+_pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+_generation: int = 0  # 每次重新配置后递增, 线程据此丢弃旧的 Session
+
+
+def configure_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    keep_alive: bool = True,
+    pool_block: bool = False,
+) -> None:
+    """配置共享连接池
+
+    已有的连接会被关闭, 之后各线程取到的 Session 使用新的连接池.
+
+    Args:
+        pool_connections (int): 缓存的 host 连接池个数, 默认 16
+        pool_maxsize (int): 每个 host 连接池的最大连接数, 建议不小于并发线程数, 默认 32
+        keep_alive (bool): 是否保持长连接, 默认 True
+        pool_block (bool): 连接数达到上限时是否阻塞等待空闲连接, 默认 False
+    """
+    global _adapter, _keep_alive, _pool_maxsize, _generation
+    with _lock:
+        old = _adapter
+        _adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        _keep_alive = keep_alive
+        _pool_maxsize = pool_maxsize
+        _generation += 1
+    if old is not None:
+        old.close()
+
+
+def _get_adapter() -> HTTPAdapter:
+    if _adapter is None:
+        with _lock:
+            if _adapter is None:
+                configure_session()
+    assert _adapter is not None
+    return _adapter
+
+
+def get_session() -> requests.Session:
+    """获取当前线程的 Session (共享进程级连接池)"""
+    adapter = _get_adapter()
+    session: Optional[requests.Session] = getattr(_local, "session", None)
+    if session is None or getattr(_local, "generation", None) != _generation:
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive" if _keep_alive else "close"
+        _local.session = session
+        _local.generation = _generation
+    return session
+
+
+def close_session() -> None:
+    """关闭所有连接, 下次请求时会重新建立连接池"""
+    global _adapter, _generation
+    with _lock:
+        old, _adapter = _adapter, None
+        _generation += 1
+    if old is not None:
+        old.close()
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> Any:
+    """获取当前事件循环共享的 `httpx.AsyncClient`
+
+    !!! note "注意"
+        依赖 `httpx` 库, 请先安装 `pip install "cpanbd[aio]"`
+    """
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError(AIO_IMPORT_ERROR) from e
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=_pool_maxsize,
+            max_keepalive_connections=_pool_maxsize if _keep_alive else 0,
+        )
+        client = httpx.AsyncClient(
+            limits=limits,
+            timeout=DEFAULT_ASYNC_TIMEOUT,
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """关闭当前事件循环的 `httpx.AsyncClient`"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+__all__ = [
+    "DEFAULT_POOL_CONNECTIONS",
+    "DEFAULT_POOL_MAXSIZE",
+    "DEFAULT_ASYNC_TIMEOUT",
+    "configure_session",
+    "get_session",
+    "close_session",
+    "get_async_client",
+    "aclose_async_client",
+]
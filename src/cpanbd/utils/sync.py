@@ -0,0 +1,467 @@
+"""本地目录与网盘目录的同步计划
+
+比较本地目录树和网盘 `listall` 的结果, 生成最小的传输计划 (上传、下载、删除、重命名),
+只传输有变化的文件.
+
+判断文件是否相同:
+
+1. 大小不同: 不同
+2. 大小相同, 本地 mtime 与网盘记录的 local_mtime 一致 (`UploadFile.upload_file` 会上传本地 mtime): 相同
+3. 否则按 `compare` 参数: `size` 视为相同, `mtime` 视为不同, `md5` 计算本地 md5 与网盘(解密后的) md5 比较
+
+```python
+from cpanbd import File
+from cpanbd.utils.sync import plan_sync
+
+file = File()
+plan = plan_sync("backup", "/apps/xxx/backup", file.iter_listall("/apps/xxx/backup"), compare="md5")
+print(plan.summary())
+plan.execute()
+```
+"""
+
+import os
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Iterable, Literal, Optional
+
+from pydantic import Field, dataclasses
+
+from .journal import JOURNAL_SUFFIX
+from .md5 import calculate_md5, decrypt_md5
+
+Direction = Literal["push", "pull", "both"]
+CompareMode = Literal["size", "mtime", "md5"]
+Action = Literal[
+    "upload",
+    "download",
+    "delete_remote",
+    "delete_local",
+    "rename_remote",
+    "rename_local",
+]
+
+
+@dataclasses.dataclass
+class SyncOp:
+    """
+    同步计划中的一项操作
+
+    Attributes:
+        action (str): upload, download, delete_remote, delete_local, rename_remote, rename_local
+        local (str): 本地路径
+        remote (str): 网盘路径
+        size (int): 文件大小
+        dest (str): 重命名的目标路径 (rename_remote 为网盘路径, rename_local 为本地路径)
+        fs_id (int): 网盘文件的 fs_id (下载时用于获取 dlink)
+        reason (str): 原因, 如 new、size、mtime、md5、missing
+    """
+
+    action: Action
+    local: Optional[str] = None
+    remote: Optional[str] = None
+    size: int = 0
+    dest: Optional[str] = None
+    fs_id: Optional[int] = None
+    reason: str = ""
+
+
+@dataclasses.dataclass
+class SyncPlan:
+    """
+    同步计划
+
+    Attributes:
+        local_root (str): 本地目录
+        remote_root (str): 网盘目录
+        ops (list[SyncOp]): 操作列表
+        unchanged (int): 无需处理的文件数
+    """
+
+    local_root: str
+    remote_root: str
+    ops: list[SyncOp] = Field(default_factory=list)
+    unchanged: int = 0
+
+    def by_action(self, action: Action) -> list[SyncOp]:
+        return [op for op in self.ops if op.action == action]
+
+    @property
+    def uploads(self) -> list[SyncOp]:
+        return self.by_action("upload")
+
+    @property
+    def downloads(self) -> list[SyncOp]:
+        return self.by_action("download")
+
+    @property
+    def deletes(self) -> list[SyncOp]:
+        return [op for op in self.ops if op.action.startswith("delete")]
+
+    @property
+    def renames(self) -> list[SyncOp]:
+        return [op for op in self.ops if op.action.startswith("rename")]
+
+    def summary(self) -> dict[str, int]:
+        """各类操作的数量, 以及需要上传/下载的字节数"""
+        res: dict[str, int] = {}
+        for op in self.ops:
+            res[op.action] = res.get(op.action, 0) + 1
+        res["upload_bytes"] = sum(op.size for op in self.uploads)
+        res["download_bytes"] = sum(op.size for op in self.downloads)
+        res["unchanged"] = self.unchanged
+        return res
+
+    def execute(self, file: Any = None, verbose: bool = True) -> list["SyncFailure"]:
+        """执行同步计划
+
+        网盘的重命名、删除通过 `File.bulk` 批量执行; 上传使用 `UploadFile.upload_file` (覆盖同名文件),
+        下载使用 `download_file` (dlink 按 100 个一批查询). 单个操作失败时打印原因并继续执行其余操作.
+
+        Args:
+            file (File): File 对象, 为 None 时新建
+            verbose (bool): 是否打印进度
+
+        Returns:
+            list[SyncFailure]: 失败的操作, 全部成功时为空列表
+        """
+        from ..file import File
+        from ..uploadfile import UploadFile
+        from .auth import get_auth
+        from .download import download_file
+
+        file = file or File()
+        failures: list[SyncFailure] = []
+
+        def fail(op: SyncOp, error: str) -> None:
+            print(f"❌ {op.action} 失败: {op.local or op.remote}, {error}")
+            failures.append(SyncFailure(op=op, error=error))
+
+        for op in self.by_action("rename_local"):
+            assert op.local and op.dest
+            try:
+                Path(op.dest).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(op.local, op.dest)
+            except OSError as e:
+                fail(op, str(e))
+        for op in self.by_action("delete_local"):
+            assert op.local
+            try:
+                os.remove(op.local)
+            except OSError as e:
+                fail(op, str(e))
+
+        rename_ops = [
+            op for op in self.by_action("rename_remote") if op.remote and op.dest
+        ]
+        renames = [
+            {
+                "path": op.remote,
+                "dest": str(PurePosixPath(op.dest).parent),
+                "newname": PurePosixPath(op.dest).name,
+            }
+            for op in rename_ops
+        ]
+        delete_ops = [op for op in self.by_action("delete_remote") if op.remote]
+        bulk = file.bulk(ondup="overwrite")
+        for ops, results in (
+            (rename_ops, bulk.move(renames)),
+            (delete_ops, bulk.delete([op.remote for op in delete_ops])),
+        ):
+            for r in results:
+                if not r.ok:
+                    fail(ops[r.index], f"errno={r.errno}")
+
+        uploader = UploadFile()
+        for op in self.uploads:
+            assert op.local and op.remote
+            if verbose:
+                print(f"⬆️ {op.local} -> {op.remote}")
+            try:
+                res = uploader.upload_file(
+                    op.local, op.remote, rtype=3, show_progress=verbose
+                )
+            except Exception as e:
+                fail(op, str(e))
+                continue
+            if not res or res.get("errno") != 0:
+                fail(op, f"上传失败: {res}")
+
+        downloads = [op for op in self.downloads if op.fs_id is not None]
+        if not downloads:
+            return failures
+        with file.meta_loader(dlink=1) as loader:
+            futures = loader.load_many(op.fs_id for op in downloads)
+        for op, future in zip(downloads, futures, strict=True):
+            assert op.local and op.remote
+            meta = future.result()
+            if not meta:
+                fail(op, "无法获取文件的元信息(dlink 和 md5)")
+                continue
+            Path(op.local).parent.mkdir(parents=True, exist_ok=True)
+            try:
+                download_file(
+                    url=meta["dlink"] + "&access_token=" + (get_auth().token or ""),
+                    output_path=op.local,
+                    headers={"User-Agent": "pan.baidu.com"},
+                    overwrite=True,
+                    verbose=verbose,
+                    expected_md5=decrypt_md5(meta["md5"]),
+                )
+            except Exception as e:
+                fail(op, str(e))
+                continue
+            # download_file 失败时只打印并返回, 按文件大小和是否留下断点信息判断
+            local = Path(op.local)
+            if (
+                not local.is_file()
+                or local.stat().st_size != op.size
+                or Path(op.local + ".meta").exists()
+            ):
+                fail(op, "下载未完成")
+        return failures
+
+
+@dataclasses.dataclass
+class SyncFailure:
+    """
+    执行失败的操作
+
+    Attributes:
+        op (SyncOp): 失败的操作
+        error (str): 失败原因
+    """
+
+    op: SyncOp
+    error: str
+
+
+def scan_local(
+    root: str, exclude: Optional[Callable[[str], bool]] = None
+) -> dict[str, os.stat_result]:
+    """递归列出本地目录下的文件, 返回 相对路径(/ 分隔) -> stat
+
+    Args:
+        root (str): 本地目录
+        exclude (Callable): 返回 True 的相对路径会被跳过
+    """
+    result: dict[str, os.stat_result] = {}
+    stack = [Path(root)]
+    base = Path(root)
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                rel = Path(entry.path).relative_to(base).as_posix()
+                if exclude and exclude(rel):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    result[rel] = entry.stat()
+    return result
+
+
+def _default_exclude(rel: str) -> bool:
+    # 下载和上传的断点信息
+    return rel.endswith((".meta", JOURNAL_SUFFIX, JOURNAL_SUFFIX + ".tmp"))
+
+
+def plan_sync(
+    local_root: str,
+    remote_root: str,
+    remote_entries: Iterable[Any],
+    direction: Direction = "push",
+    compare: CompareMode = "mtime",
+    delete: bool = False,
+    detect_renames: bool = True,
+    mtime_tolerance: int = 2,
+    exclude: Optional[Callable[[str], bool]] = _default_exclude,
+) -> SyncPlan:
+    """生成同步计划, 不会修改任何文件
+
+    Args:
+        local_root (str): 本地目录
+        remote_root (str): 网盘目录, 必须/开头
+        remote_entries (Iterable): 网盘目录下(含递归)的文件信息, 如 `File.iter_listall(remote_root)`
+            或 `FileTable`, 需要 path、size、isdir、md5、server_mtime、local_mtime
+        direction (str): push 本地 -> 网盘, pull 网盘 -> 本地, both 双向(较新的一方覆盖另一方)
+        compare (str): 大小相同但 mtime 不一致时的判断方式: size 视为相同, mtime 视为不同, md5 计算 md5 比较
+        delete (bool): 是否删除目标端多出来的文件 (push 删除网盘文件, pull 删除本地文件)
+        detect_renames (bool): delete 为 True 时, 大小和 md5 都相同的 新增+删除 合并为重命名
+        mtime_tolerance (int): mtime 允许的误差(秒)
+        exclude (Callable): 本地相对路径返回 True 时跳过, 默认跳过 `.meta` 和 `.bdupload.json` 文件
+
+    Returns:
+        SyncPlan: 同步计划
+    """
+    assert remote_root.startswith("/"), "❌ 网盘路径必须以 / 开头"
+    remote_root = remote_root.rstrip("/") or "/"
+    remote_prefix = "/" if remote_root == "/" else remote_root + "/"
+    local = scan_local(local_root, exclude)
+    remote: dict[str, Any] = {}
+    for item in remote_entries:
+        if item["isdir"] == 1 or not item["path"].startswith(remote_prefix):
+            continue
+        remote[item["path"][len(remote_prefix) :]] = item
+
+    plan = SyncPlan(local_root=str(local_root), remote_root=remote_root)
+
+    def local_path(rel: str) -> str:
+        return str(Path(local_root) / rel)
+
+    def remote_path(rel: str) -> str:
+        return remote_prefix + rel
+
+    md5_cache: dict[str, str] = {}
+
+    def local_md5(rel: str) -> str:
+        if rel not in md5_cache:
+            md5_cache[rel] = calculate_md5(local_path(rel))
+        return md5_cache[rel]
+
+    def remote_md5(item: Any) -> str:
+        try:
+            return decrypt_md5(item.get("md5") or "")
+        except ValueError:
+            return ""  # 非加密格式的 md5, 视为不同
+
+    def same(rel: str, st: os.stat_result, item: Any) -> Optional[str]:
+        """相同时返回 None, 否则返回原因"""
+        if st.st_size != int(item["size"]):
+            return "size"
+        if abs(int(st.st_mtime) - int(item.get("local_mtime") or 0)) <= mtime_tolerance:
+            return None
+        if compare == "size":
+            return None
+        if compare == "md5" and local_md5(rel) == remote_md5(item):
+            return None
+        return compare
+
+    only_local: list[str] = []
+    for rel, st in local.items():
+        item = remote.get(rel)
+        if item is None:
+            only_local.append(rel)
+            continue
+        reason = same(rel, st, item)
+        if reason is None:
+            plan.unchanged += 1
+            continue
+        if direction == "push" or (
+            direction == "both" and st.st_mtime >= int(item.get("server_mtime") or 0)
+        ):
+            plan.ops.append(
+                SyncOp(
+                    action="upload",
+                    local=local_path(rel),
+                    remote=remote_path(rel),
+                    size=st.st_size,
+                    reason=reason,
+                )
+            )
+        else:
+            plan.ops.append(
+                SyncOp(
+                    action="download",
+                    local=local_path(rel),
+                    remote=remote_path(rel),
+                    size=int(item["size"]),
+                    fs_id=int(item["fs_id"]),
+                    reason=reason,
+                )
+            )
+    only_remote = [rel for rel in remote if rel not in local]
+
+    # 新增 + 删除 -> 重命名 (只比较大小相同的候选, 再用 md5 确认)
+    renamed_local: set[str] = set()
+    renamed_remote: set[str] = set()
+    if delete and detect_renames and direction != "both":
+        by_size: dict[int, list[str]] = {}
+        for rel in only_remote:
+            by_size.setdefault(int(remote[rel]["size"]), []).append(rel)
+        for rel in only_local:
+            candidates = by_size.get(local[rel].st_size)
+            if not candidates:
+                continue
+            for other in candidates:
+                if other in renamed_remote or local_md5(rel) != remote_md5(
+                    remote[other]
+                ):
+                    continue
+                renamed_local.add(rel)
+                renamed_remote.add(other)
+                if direction == "push":
+                    op = SyncOp(
+                        action="rename_remote",
+                        remote=remote_path(other),
+                        dest=remote_path(rel),
+                        size=local[rel].st_size,
+                        reason="md5",
+                    )
+                else:
+                    op = SyncOp(
+                        action="rename_local",
+                        local=local_path(rel),
+                        dest=local_path(other),
+                        size=local[rel].st_size,
+                        reason="md5",
+                    )
+                plan.ops.append(op)
+                break
+
+    for rel in only_local:
+        if rel in renamed_local:
+            continue
+        if direction == "pull":
+            if delete:
+                plan.ops.append(
+                    SyncOp(
+                        action="delete_local",
+                        local=local_path(rel),
+                        size=local[rel].st_size,
+                        reason="missing",
+                    )
+                )
+        else:
+            plan.ops.append(
+                SyncOp(
+                    action="upload",
+                    local=local_path(rel),
+                    remote=remote_path(rel),
+                    size=local[rel].st_size,
+                    reason="new",
+                )
+            )
+    for rel in only_remote:
+        if rel in renamed_remote:
+            continue
+        if direction == "push":
+            if delete:
+                plan.ops.append(
+                    SyncOp(
+                        action="delete_remote",
+                        remote=remote_path(rel),
+                        size=int(remote[rel]["size"]),
+                        reason="missing",
+                    )
+                )
+        else:
+            plan.ops.append(
+                SyncOp(
+                    action="download",
+                    local=local_path(rel),
+                    remote=remote_path(rel),
+                    size=int(remote[rel]["size"]),
+                    fs_id=int(remote[rel]["fs_id"]),
+                    reason="new",
+                )
+            )
+    return plan
+
+
+__all__ = [
+    "SyncFailure",
+    "SyncOp",
+    "SyncPlan",
+    "plan_sync",
+    "scan_local",
+]
@@ -0,0 +1,212 @@
+"""按列存储的文件列表
+
+`list_files`/`listall`/`search` 返回的每一项都是一个 dict, 上百万项时仅重复的键名和小整数对象
+就要占用数 GB 内存. `FileTable` 把文件信息按列保存:
+
+- fs_id、size、server_mtime、server_ctime、local_mtime、isdir、category 保存在 `array` 中
+- path、md5 编码为 utf-8 后依次拼接在一个 `bytearray` 中, 另用 `array` 记录偏移量
+
+每项大约只占用 路径长度 + 100 字节, 按需读取单行或单列, 也可以过滤.
+
+!!! note "注意"
+    与接口返回的 dict 不同, 每一行都有全部的列: 缺少的整数列 (如文件夹没有 category) 读取为 0;
+    缺少的 path、md5 (如文件夹没有 md5) 读取为 None.
+
+```python
+from cpanbd import File
+from cpanbd.utils.table import FileTable
+
+file = File()
+table = FileTable.from_items(file.iter_listall("/", recursion=1))
+big = table.filter(lambda row: row["isdir"] == 0 and row["size"] > 1 << 30)
+for row in big:
+    print(row["path"], row["size"])
+```
+"""
+
+from array import array
+from pathlib import PurePosixPath
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+# 整数列: 列名 -> array 的类型码
+INT_COLUMNS: dict[str, str] = {
+    "fs_id": "q",
+    "size": "q",
+    "server_mtime": "q",
+    "server_ctime": "q",
+    "local_mtime": "q",
+    "isdir": "b",
+    "category": "b",
+}
+STR_COLUMNS = ("path", "md5")
+
+
+class _StringColumn:
+    """把字符串依次拼接保存, offsets[i]:offsets[i+1] 为第 i 项, nulls[i] 为 1 时该项为 None"""
+
+    __slots__ = ("data", "offsets", "nulls")
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        self.nulls = bytearray()
+
+    def append(self, value: Optional[str]) -> None:
+        if value:
+            self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+        self.nulls.append(value is None)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.nulls[i]:
+            return None
+        return self.data[self.offsets[i] : self.offsets[i + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def nbytes(self) -> int:
+        offsets = self.offsets.itemsize * len(self.offsets)
+        return len(self.data) + offsets + len(self.nulls)
+
+
+class FileRow:
+    """`FileTable` 中的一行, 只在访问时读取对应的列, 支持 `row["path"]` 和 `row.path`"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "FileTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table.value(key, self._index)
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self._table.value(key, self._index)
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为与接口返回格式相同的 dict"""
+        return {key: self[key] for key in self._table.fields}
+
+    def __repr__(self) -> str:
+        return f"FileRow({self.to_dict()!r})"
+
+
+class FileTable:
+    """按列存储的文件列表, 支持按行读取、按列读取和过滤
+
+    缺少的整数列读取为 0, 缺少的 path、md5 读取为 None.
+    """
+
+    fields = ("path", "server_filename", "md5", *INT_COLUMNS)
+
+    def __init__(self) -> None:
+        self._ints: dict[str, array] = {
+            name: array(code) for name, code in INT_COLUMNS.items()
+        }
+        self._strs: dict[str, _StringColumn] = {
+            name: _StringColumn() for name in STR_COLUMNS
+        }
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict[str, Any]]) -> "FileTable":
+        """从接口返回的文件信息(可以是生成器)创建"""
+        table = cls()
+        table.extend(items)
+        return table
+
+    def append(self, item: dict[str, Any]) -> None:
+        """追加一项接口返回的文件信息"""
+        for name, column in self._ints.items():
+            column.append(int(item.get(name) or 0))
+        for name, column in self._strs.items():
+            column.append(item.get(name))
+
+    def extend(self, items: Iterable[dict[str, Any]]) -> None:
+        for item in items:
+            self.append(item)
+
+    def __len__(self) -> int:
+        return len(self._ints["fs_id"])
+
+    def value(self, key: str, index: int) -> Any:
+        """第 index 行 key 列的值"""
+        if key in self._ints:
+            return self._ints[key][index]
+        if key in self._strs:
+            return self._strs[key][index]
+        if key == "server_filename":
+            path = self._strs["path"][index]
+            return None if path is None else PurePosixPath(path).name
+        raise KeyError(key)
+
+    def column(self, key: str) -> Union[array, list[Optional[str]]]:
+        """整列数据, 整数列直接返回 array (不复制, 请勿修改)"""
+        if key in self._ints:
+            return self._ints[key]
+        return [self.value(key, i) for i in range(len(self))]
+
+    def __getitem__(self, index: int) -> FileRow:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("FileTable index out of range")
+        return FileRow(self, index)
+
+    def __iter__(self) -> Iterator[FileRow]:
+        for i in range(len(self)):
+            yield FileRow(self, i)
+
+    def take(self, indices: Iterable[int]) -> "FileTable":
+        """按行号取出若干行, 组成新的 FileTable"""
+        table = FileTable()
+        for i in indices:
+            for name, column in self._ints.items():
+                table._ints[name].append(column[i])
+            for name, column in self._strs.items():
+                dst = table._strs[name]
+                dst.data += column.data[column.offsets[i] : column.offsets[i + 1]]
+                dst.offsets.append(len(dst.data))
+                dst.nulls.append(column.nulls[i])
+        return table
+
+    def filter(self, predicate: Callable[[FileRow], bool]) -> "FileTable":
+        """过滤, 返回满足 predicate 的行组成的新 FileTable
+
+        Example:
+            ```python
+            files = table.filter(lambda row: row["isdir"] == 0)
+            ```
+        """
+        return self.take(i for i, row in enumerate(self) if predicate(row))
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """转换为 dict 列表 (数据量大时会占用大量内存)"""
+        return [row.to_dict() for row in self]
+
+    def nbytes(self) -> int:
+        """各列占用的字节数(近似值)"""
+        ints = sum(column.itemsize * len(column) for column in self._ints.values())
+        return ints + sum(column.nbytes() for column in self._strs.values())
+
+    def __repr__(self) -> str:
+        return f"FileTable(rows={len(self)}, nbytes={self.nbytes()})"
+
+
+__all__ = [
+    "INT_COLUMNS",
+    "STR_COLUMNS",
+    "FileRow",
+    "FileTable",
+]
@@ -0,0 +1,258 @@
+"""响应数据的 schema 校验
+
+- 每个接口的 jsonschema 校验器只编译一次, 按接口名称缓存
+- `response_schema` 编译成 `ResponseSchemaChecker`, 一次遍历响应数据即可检查所有规则
+- 通过校验策略控制校验的开销:
+    - `full`: 完整校验
+    - `sample`: 只校验数组的前 `sample_size` 项 (适合 `listall`/`search` 这种一页上千项的接口)
+    - `off`: 不校验
+
+策略可以按客户端设置, 也可以用 `validation_policy` 对某段代码临时设置:
+
+```python
+from cpanbd import File
+from cpanbd.utils.validation import validation_policy
+
+file = File(validation="sample")
+with validation_policy("full"):
+    file.list_files(dir="/")
+```
+"""
+
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Literal, Optional, Union
+
+from pydantic import Field, dataclasses
+
+ValidationMode = Literal["full", "sample", "off"]
+
+
+@dataclasses.dataclass(frozen=True)
+class ValidationPolicy:
+    """
+    响应校验策略
+
+    Attributes:
+        mode (str): full 完整校验, sample 抽样校验, off 不校验
+        sample_size (int): 抽样校验时, 每个数组最多校验的项数
+    """
+
+    mode: ValidationMode = "off"
+    sample_size: int = Field(default=20, ge=1)
+
+
+DEFAULT_POLICY = ValidationPolicy()
+
+_policy_var: contextvars.ContextVar[Optional[ValidationPolicy]] = (
+    contextvars.ContextVar("validation_policy", default=None)
+)
+_validators: dict[str, Any] = {}
+_validators_lock = threading.Lock()
+
+
+def as_policy(
+    policy: Union[ValidationPolicy, ValidationMode, None],
+) -> Optional[ValidationPolicy]:
+    """把 `"full"`/`"sample"`/`"off"` 转换为 `ValidationPolicy`"""
+    if policy is None or isinstance(policy, ValidationPolicy):
+        return policy
+    return ValidationPolicy(mode=policy)
+
+
+def current_policy(
+    default: Union[ValidationPolicy, ValidationMode, None] = None,
+) -> ValidationPolicy:
+    """当前生效的校验策略: `validation_policy` > 客户端设置 > `DEFAULT_POLICY`"""
+    return _policy_var.get() or as_policy(default) or DEFAULT_POLICY
+
+
+@contextmanager
+def validation_policy(
+    mode: Union[ValidationPolicy, ValidationMode], sample_size: int = 20
+) -> Iterator[ValidationPolicy]:
+    """临时设置校验策略 (对当前线程/协程生效)
+
+    Args:
+        mode (str | ValidationPolicy): full, sample 或 off
+        sample_size (int): 抽样校验时, 每个数组最多校验的项数
+    """
+    policy = (
+        mode
+        if isinstance(mode, ValidationPolicy)
+        else ValidationPolicy(mode=mode, sample_size=sample_size)
+    )
+    token = _policy_var.set(policy)
+    try:
+        yield policy
+    finally:
+        _policy_var.reset(token)
+
+
+def get_validator(schema: dict, key: str = "") -> Any:
+    """获取编译好的 jsonschema 校验器
+
+    Args:
+        schema (dict): jsonschema
+        key (str): 缓存的键, 一般为 `分类.接口名`, 为空时按 schema 内容缓存
+    """
+    key = key or json.dumps(schema, sort_keys=True)
+    validator = _validators.get(key)
+    if validator is None:
+        from jsonschema.validators import validator_for
+
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema)
+        with _validators_lock:
+            _validators.setdefault(key, validator)
+    return validator
+
+
+def _sample(instance: Any, size: int) -> Any:
+    """截取每个数组的前 size 项"""
+    if isinstance(instance, list):
+        return [_sample(v, size) for v in instance[:size]]
+    if isinstance(instance, dict):
+        return {k: _sample(v, size) for k, v in instance.items()}
+    return instance
+
+
+def validate_schema(
+    instance: Any,
+    schema: dict,
+    policy: ValidationPolicy = DEFAULT_POLICY,
+    key: str = "",
+) -> None:
+    """按策略校验响应数据, 校验失败时抛出 `jsonschema.ValidationError`
+
+    Args:
+        instance (Any): 响应数据
+        schema (dict): jsonschema
+        policy (ValidationPolicy): 校验策略
+        key (str): 校验器的缓存键
+    """
+    if policy.mode == "off" or not schema:
+        return
+    if policy.mode == "sample":
+        instance = _sample(instance, policy.sample_size)
+    validator = get_validator(schema, key)
+    validator.validate(instance)
+
+
+TYPE_MAPPING: dict[str, Any] = {
+    "string": str,
+    "number": (int, float),
+    "int": int,
+    "float": float,
+    "boolean": bool,
+    "bool": bool,
+    "object": dict,
+    "array": list,
+}
+
+_MISSING = object()
+
+
+class ResponseSchemaChecker:
+    """编译后的 `response_schema` 检查器
+
+    `response_schema` 形如 `{"key": {"type": "string"}}`, 表示响应中(任意层级)第一个
+    名为 key 的值必须是 string 类型, 与 `jsonpath(res, "$..key")[0]` 的语义一致.
+    key 也可以写成 `a.b`, 表示第一个含有 `b` 的 `a`.
+
+    所有规则在一次先序遍历中一起检查, 全部找到后提前结束, 不再对每个 key 各扫描一遍.
+    """
+
+    __slots__ = ("rules", "_heads")
+
+    def __init__(self, schema: dict) -> None:
+        # (key, 首段, 其余段, 类型名, 预期类型)
+        self.rules: tuple = tuple(
+            (
+                key,
+                key.split(".")[0],
+                tuple(key.split(".")[1:]),
+                rule["type"],
+                TYPE_MAPPING.get(rule["type"]),
+            )
+            for key, rule in schema.items()
+        )
+        self._heads = frozenset(r[1] for r in self.rules)
+
+    @staticmethod
+    def _follow(value: Any, rest: tuple) -> Any:
+        for k in rest:
+            if not isinstance(value, dict) or k not in value:
+                return _MISSING
+            value = value[k]
+        return value
+
+    def find(self, data: Any) -> dict[str, Any]:
+        """一次遍历找到每条规则对应的第一个值"""
+        found: dict[str, Any] = {}
+        total = len(self.rules)
+        stack = [data]
+        while stack and len(found) < total:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if not self._heads.isdisjoint(node):
+                    for key, head, rest, _, _ in self.rules:
+                        if key in found or head not in node:
+                            continue
+                        value = self._follow(node[head], rest)
+                        if value is not _MISSING:
+                            found[key] = value
+                children = list(node.values())
+            elif isinstance(node, list):
+                children = node
+            else:
+                continue
+            # 倒序入栈, 保证按文档顺序访问
+            stack.extend(reversed(children))
+        return found
+
+    def check(self, data: Any) -> list[str]:
+        """检查响应数据, 返回错误信息列表 (为空表示通过)"""
+        found = self.find(data)
+        errors = []
+        for key, _, _, type_name, expected_type in self.rules:
+            if key not in found:
+                errors.append(f"Key '{key}' 不存在于响应中")
+            elif expected_type and not isinstance(found[key], expected_type):
+                errors.append(f"Key '{key}' 预期类型: {type_name}")
+        return errors
+
+
+_checkers: dict[str, ResponseSchemaChecker] = {}
+
+
+def get_response_checker(schema: dict, key: str = "") -> ResponseSchemaChecker:
+    """获取编译好的 `response_schema` 检查器
+
+    Args:
+        schema (dict): response_schema
+        key (str): 缓存的键, 一般为 `分类.接口名`, 为空时按 schema 内容缓存
+    """
+    key = key or json.dumps(schema, sort_keys=True)
+    checker = _checkers.get(key)
+    if checker is None:
+        checker = _checkers.setdefault(key, ResponseSchemaChecker(schema))
+    return checker
+
+
+__all__ = [
+    "DEFAULT_POLICY",
+    "ResponseSchemaChecker",
+    "TYPE_MAPPING",
+    "ValidationMode",
+    "ValidationPolicy",
+    "as_policy",
+    "current_policy",
+    "get_response_checker",
+    "get_validator",
+    "validate_schema",
+    "validation_policy",
+]
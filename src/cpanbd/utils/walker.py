@@ -0,0 +1,113 @@
+"""并发遍历网盘目录
+
+`File.listall(recursion=1)` 只能用一个 cursor 顺序翻页. 目录很多、很宽时, 用 `list_files`
+同时列出多个目录会快很多. `walk` 按广度优先把目录分给线程池, 每个目录内部按 start/limit 翻页,
+与 `os.walk` 一样返回 `(dirpath, dirs, files)`.
+
+```python
+from cpanbd import File
+from cpanbd.utils.walker import walk
+
+file = File()
+for dirpath, dirs, files in walk(file, "/我的资源", max_workers=8):
+    # dirs 和 files 是 list_files 返回的文件信息(dict)
+    dirs[:] = [d for d in dirs if d["server_filename"] != "tmp"]  # 不进入 tmp 目录
+    for f in files:
+        print(f["path"], f["size"])
+```
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from ..file import File
+
+LIST_FILES_MAX_LIMIT = 1000  # list_files 接口 limit 的上限
+
+WalkItem = tuple[str, list[dict[str, Any]], list[dict[str, Any]]]
+
+
+def list_dir(
+    file: "File", path: str, page_size: int = LIST_FILES_MAX_LIMIT, **kwargs: Any
+) -> list[dict[str, Any]]:
+    """列出单个目录下的全部文件和文件夹 (不递归), 自动翻页
+
+    Raises:
+        ValueError: 获取文件列表失败
+    """
+    limit = max(1, min(page_size, LIST_FILES_MAX_LIMIT))
+    entries: list[dict[str, Any]] = []
+    start = 0
+    while True:
+        res = file.list_files(dir=path, start=start, limit=limit, **kwargs)
+        if not res or "list" not in res:
+            raise ValueError(f"❌ 获取文件列表失败: {path}, {res}")
+        entries.extend(res["list"])
+        if len(res["list"]) < limit:
+            return entries
+        start += limit
+
+
+def walk(
+    file: "File",
+    top: str = "/",
+    max_workers: int = 8,
+    page_size: int = LIST_FILES_MAX_LIMIT,
+    onerror: Optional[Callable[[str, Exception], None]] = None,
+    **kwargs: Any,
+) -> Iterator[WalkItem]:
+    """广度优先并发遍历网盘目录
+
+    同时最多列出 `max_workers` 个目录, 哪个目录先列完就先返回哪个, 所以返回顺序不固定.
+    与 `os.walk(topdown=True)` 一样, 可以原地修改 dirs 来跳过某些子目录.
+
+    Args:
+        file (File): File 对象
+        top (str): 起始目录, 必须/开头
+        max_workers (int): 最大并发数, 默认为8
+        page_size (int): 每页数量, 最大1000, 默认为1000
+        onerror (Callable): 列目录失败时的回调 `onerror(path, exception)`, 为 None 时直接抛出异常
+        **kwargs: 其他 `list_files` 参数, 如 order, desc, showempty
+
+    Yields:
+        tuple: (dirpath, dirs, files), dirs 和 files 为 `list_files` 返回的文件信息
+    """
+    assert top.startswith("/"), "❌ 目录路径必须以 / 开头"
+    kwargs.setdefault("web", 0)  # 不需要缩略图
+    max_workers = max(1, max_workers)
+    pending: deque[str] = deque([top.rstrip("/") or "/"])
+    running: dict[Future, str] = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers:
+                path = pending.popleft()
+                future = executor.submit(list_dir, file, path, page_size, **kwargs)
+                running[future] = path
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    if onerror is None:
+                        raise
+                    onerror(path, e)
+                    continue
+                dirs = [item for item in entries if item["isdir"] == 1]
+                files = [item for item in entries if item["isdir"] != 1]
+                yield path, dirs, files
+                # 调用方可能修改了 dirs, 所以在 yield 之后再加入队列
+                pending.extend(item["path"] for item in dirs)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = [
+    "LIST_FILES_MAX_LIMIT",
+    "WalkItem",
+    "list_dir",
+    "walk",
+]
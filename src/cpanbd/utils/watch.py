@@ -0,0 +1,182 @@
+"""监视网盘目录的变化
+
+`RemoteWatcher` 记录已见到的最大 mtime/ctime (高水位), 每次轮询只通过 `listall` 的 mtime/ctime 参数
+请求比高水位更新的文件, 把整目录重新列一遍变成只取增量. 新上传的文件产生 `added` 事件,
+修改过的文件产生 `modified` 事件.
+
+- 有变化时按 `interval` 轮询; 连续没有变化时, 间隔逐渐增大到 `max_interval`
+- 请求失败时同样退避, 不会中断监视
+
+```python
+from cpanbd import File
+from cpanbd.utils.watch import RemoteWatcher
+
+watcher = RemoteWatcher(File(), "/apps/xxx/inbox", interval=30)
+for event in watcher:  # 或 watcher.run(callback)
+    print(event.kind, event.path)
+```
+
+!!! note "注意"
+    删除的文件不会产生事件.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Literal, Optional
+
+from pydantic import dataclasses
+
+if TYPE_CHECKING:
+    from ..file import File
+
+EventKind = Literal["added", "modified"]
+
+
+@dataclasses.dataclass
+class ChangeEvent:
+    """
+    目录变化事件
+
+    Attributes:
+        kind (str): added 新上传, modified 修改
+        item (dict): `listall` 返回的文件信息
+    """
+
+    kind: EventKind
+    item: dict
+
+    @property
+    def path(self) -> str:
+        return self.item["path"]
+
+
+class RemoteWatcher:
+    """轮询网盘目录, 产生新增/修改事件
+
+    Attributes:
+        file (File): File 对象
+        path (str): 监视的目录, 必须/开头
+        recursion (int): 是否包含子目录, 默认为1
+        interval (float): 轮询间隔(秒)
+        max_interval (float): 没有变化或出错时, 轮询间隔最大增加到的秒数
+        backoff (float): 没有变化或出错时, 轮询间隔乘以的系数
+        overlap (int): 每次多往前查询的秒数, 避免同一秒内上传的文件被漏掉 (重复的会被过滤)
+        mtime (int): 当前的 mtime 高水位
+        ctime (int): 当前的 ctime 高水位
+    """
+
+    def __init__(
+        self,
+        file: "File",
+        path: str = "/",
+        recursion: int = 1,
+        interval: float = 60.0,
+        max_interval: float = 600.0,
+        backoff: float = 2.0,
+        overlap: int = 2,
+        since: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            since (int): 从这个时间戳之后的变化开始监视. 为 None 时先完整列一次目录,
+                以当前目录中最大的 mtime/ctime 作为起点 (已有文件不产生事件)
+        """
+        assert path.startswith("/"), "❌ 网盘路径必须以 / 开头"
+        self.file = file
+        self.path = path
+        self.recursion = recursion
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.overlap = max(0, overlap)
+        self.mtime = since
+        self.ctime = since
+        # 高水位附近已产生事件的 fs_id -> (server_mtime, server_ctime)
+        self._seen: dict[int, tuple[int, int]] = {}
+        self._stop = threading.Event()
+
+    def _list(self, **kwargs: Any) -> Iterator[dict[str, Any]]:
+        return self.file.iter_listall(
+            self.path, recursion=self.recursion, web=0, **kwargs
+        )
+
+    def _init_marks(self) -> None:
+        mtime = ctime = 0
+        stamps: dict[int, tuple[int, int]] = {}
+        for item in self._list():
+            item_mtime = int(item.get("server_mtime") or 0)
+            item_ctime = int(item.get("server_ctime") or 0)
+            stamps[int(item["fs_id"])] = (item_mtime, item_ctime)
+            mtime, ctime = max(mtime, item_mtime), max(ctime, item_ctime)
+        self.mtime, self.ctime = mtime, ctime
+        # 已有文件中落在 overlap 区间内的, 下一次轮询会再次返回, 提前记为已见
+        self._seen = stamps
+        self._prune_seen()
+
+    def _prune_seen(self) -> None:
+        """只保留 overlap 区间内的记录"""
+        assert self.mtime is not None and self.ctime is not None
+        floor = min(self.mtime, self.ctime) - self.overlap
+        self._seen = {k: v for k, v in self._seen.items() if max(v) >= floor}
+
+    def poll(self) -> list[ChangeEvent]:
+        """请求一次增量, 返回新的事件并推进高水位"""
+        if self.mtime is None or self.ctime is None:
+            self._init_marks()
+        assert self.mtime is not None and self.ctime is not None
+        changed: dict[int, dict[str, Any]] = {}
+        for key, mark in (("mtime", self.mtime), ("ctime", self.ctime)):
+            for item in self._list(**{key: max(0, mark - self.overlap)}):
+                changed[int(item["fs_id"])] = item
+
+        events = []
+        mtime, ctime = self.mtime, self.ctime
+        for fs_id, item in changed.items():
+            item_mtime = int(item.get("server_mtime") or 0)
+            item_ctime = int(item.get("server_ctime") or 0)
+            prev = self._seen.get(fs_id)
+            if prev == (item_mtime, item_ctime):
+                continue  # overlap 区间内已经产生过事件
+            self._seen[fs_id] = (item_mtime, item_ctime)
+            is_new = item_ctime > self.ctime - self.overlap
+            if prev is not None and prev[1] == item_ctime:
+                is_new = False  # 上传时已经产生过事件, 这次只是修改
+            kind: EventKind = "added" if is_new else "modified"
+            events.append(ChangeEvent(kind=kind, item=item))
+            mtime, ctime = max(mtime, item_mtime), max(ctime, item_ctime)
+        self.mtime, self.ctime = mtime, ctime
+        self._prune_seen()
+        return events
+
+    def events(self) -> Iterator[ChangeEvent]:
+        """持续轮询, 逐个返回事件, 直到调用 `stop`"""
+        interval = self.interval
+        while not self._stop.is_set():
+            try:
+                events = self.poll()
+            except Exception as e:
+                print(f"❌ 获取目录变化失败: {e}")
+                events = None
+            if events:
+                interval = self.interval
+                yield from events
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            self._stop.wait(interval)
+
+    def __iter__(self) -> Iterator[ChangeEvent]:
+        return self.events()
+
+    def run(self, callback: Callable[[ChangeEvent], Any]) -> None:
+        """持续轮询, 每个事件调用一次 callback, 直到调用 `stop` (可以在 callback 中调用)"""
+        for event in self.events():
+            callback(event)
+
+    def stop(self) -> None:
+        """停止轮询"""
+        self._stop.set()
+
+
+__all__ = [
+    "ChangeEvent",
+    "RemoteWatcher",
+]
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from cpanbd.aio import AsyncFile, AsyncUpload, AsyncUser  # noqa: E402
+from cpanbd.file import File  # noqa: E402
+
+
+def test_sync_helpers_blocked():
+    """
+    测试异步类上基于同步接口的辅助方法会明确报错, 接口方法保持不变
+    """
+    file = AsyncFile.__new__(AsyncFile)
+    for name in (
+        "iter_listall",
+        "listall_table",
+        "walk",
+        "bulk",
+        "meta_loader",
+        "search_many",
+        "watch",
+        "iter_doclist",
+    ):
+        with pytest.raises(NotImplementedError, match=f"File.{name}"):
+            getattr(file, name)("/")
+    # 接口方法仍是 auto_args_call_api 包装后的方法
+    assert AsyncFile.list_files is File.list_files
+    assert AsyncUpload.precreate.__wrapped__
+    assert AsyncUser.uinfo.__wrapped__
@@ -0,0 +1,129 @@
+import json
+import random
+import time
+
+from cpanbd.utils.bulk import UNCONFIRMED_ERRNO, BulkFileManager
+
+
+class FakeFile:
+    """filemanager 按 handler 返回, taskquery 按 tasks 中的列表依次返回"""
+
+    def __init__(self, handler) -> None:
+        self.handler = handler
+        self.tasks: dict[int, list[dict]] = {}
+        self.requests: list[list] = []
+
+    def filemanager(self, opera, filelist, aasync, ondup):
+        items = json.loads(filelist)
+        self.requests.append(items)
+        return self.handler(items)
+
+    def taskquery(self, taskid):
+        answers = self.tasks[taskid]
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+
+
+def manager(file: FakeFile, **kwargs) -> BulkFileManager:
+    kwargs.setdefault("poll_interval", 0.001)
+    return BulkFileManager(file, **kwargs)
+
+
+def test_sync_info_by_position():
+    """
+    测试同步返回的 info 与输入数量相同时按位置对应
+    """
+    file = FakeFile(
+        lambda items: {
+            "errno": 0,
+            "info": [{"errno": 12 if i == 1 else 0} for i in range(len(items))],
+        }
+    )
+    results = manager(file).delete(["/a", "/b", "/c"])
+    assert [(r.index, r.item, r.errno) for r in results] == [
+        (0, "/a", 0),
+        (1, "/b", 12),
+        (2, "/c", 0),
+    ]
+
+
+def test_sync_info_by_path():
+    """
+    测试 info 数量不同时按 path/from 对应, 找不到的项无法确认
+    """
+    file = FakeFile(lambda items: {"errno": 0, "info": [{"path": "/c", "errno": 0}]})
+    ops = [{"path": p, "newname": "x"} for p in ("/a", "/b", "/c")]
+    results = manager(file).rename(ops)
+    assert [r.errno for r in results] == [UNCONFIRMED_ERRNO, UNCONFIRMED_ERRNO, 0]
+    assert not results[0].ok and results[0].detail["info"]
+    assert results[2].detail == {"path": "/c", "errno": 0}
+
+
+def test_task_success():
+    """
+    测试异步任务: 轮询到成功后按 list 对应, list 为空或不完整时无法确认
+    """
+    file = FakeFile(lambda items: {"errno": 0, "taskid": len(file.requests)})
+    file.tasks[1] = [
+        {"status": "running"},
+        {"status": "success", "list": [{"from": "/b", "to": "/x/b"}]},
+    ]
+    file.tasks[2] = [{"status": "success", "list": []}]
+    bulk = manager(file, chunk_size=2, max_inflight=1)
+    ops = [{"path": p, "dest": "/x"} for p in ("/a", "/b", "/c", "/d")]
+    results = bulk.move(ops)
+    assert [r.errno for r in results] == [
+        UNCONFIRMED_ERRNO,
+        0,
+        UNCONFIRMED_ERRNO,
+        UNCONFIRMED_ERRNO,
+    ]
+    assert results[1].detail == {"from": "/b", "to": "/x/b"}
+    assert results[3].detail["status"] == "success"
+
+
+def test_task_failed_and_timeout():
+    """
+    测试异步任务失败和超时时整批失败
+    """
+    file = FakeFile(lambda items: {"errno": 0, "taskid": 1})
+    file.tasks[1] = [{"status": "failed", "task_errno": 111}]
+    results = manager(file).delete(["/a", "/b"])
+    assert [r.errno for r in results] == [111, 111]
+
+    file.tasks[1] = [{"status": "running"}]
+    results = manager(file, poll_timeout=0).delete(["/a"])
+    assert results[0].errno == -1
+    assert results[0].detail == {"status": "timeout", "taskid": 1}
+
+
+def test_errors():
+    """
+    测试请求异常和只有 errno 的返回
+    """
+
+    def boom(items):
+        raise RuntimeError("network")
+
+    results = manager(FakeFile(boom)).delete(["/a", "/b"])
+    assert [(r.errno, r.detail) for r in results] == [(-1, {"error": "network"})] * 2
+
+    results = manager(FakeFile(lambda items: {"errno": 2})).delete(["/a"])
+    assert results[0].errno == 2
+
+
+def test_run_keeps_input_order():
+    """
+    测试多批并发时按输入顺序返回
+    """
+
+    def handler(items):
+        time.sleep(random.random() * 0.01)
+        return {"errno": 0, "info": [{"path": p, "errno": 0} for p in items]}
+
+    file = FakeFile(handler)
+    paths = [f"/{i}" for i in range(25)]
+    results = manager(file, chunk_size=4, max_inflight=3).delete(iter(paths))
+    assert [r.index for r in results] == list(range(25))
+    assert [r.item for r in results] == paths
+    assert all(r.ok for r in results)
+    assert sorted(len(chunk) for chunk in file.requests) == [1] + [4] * 6
@@ -0,0 +1,80 @@
+import inspect
+import json
+from types import SimpleNamespace
+
+import cpanbd.downfile as downfile_module
+from cpanbd.downfile import DownFile
+from cpanbd.utils.md5 import encrypt_md5
+
+MD5 = "0123456789abcdef0123456789abcdef"
+
+
+class FakeResolver:
+    def __init__(self, entries: dict) -> None:
+        self.entries = entries
+
+    def resolve(self, path: str):
+        if path == "/error":
+            raise ValueError("list failed")
+        return self.entries.get(path)
+
+
+class FakeFile:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def filemetas(self, **kwargs):
+        self.calls.append(kwargs)
+        return {
+            "list": [
+                {"dlink": "https://d.pcs.baidu.com/x?fid=1", "md5": encrypt_md5(MD5)}
+            ]
+        }
+
+
+def make_pan(monkeypatch, downloads: list) -> DownFile:
+    monkeypatch.setattr(
+        downfile_module, "get_auth", lambda: SimpleNamespace(token="TOKEN")
+    )
+    monkeypatch.setattr(
+        downfile_module, "download_file", lambda **kwargs: downloads.append(kwargs)
+    )
+    pan = DownFile.__new__(DownFile)
+    pan.file = FakeFile()
+    pan.resolver = FakeResolver(
+        {
+            "/a/b.txt": {"fs_id": 7, "isdir": 0},
+            "/a/dir": {"fs_id": 8, "isdir": 1},
+        }
+    )
+    return pan
+
+
+def test_downfile_downloads(monkeypatch, tmp_path):
+    """
+    测试 downfile 解析路径后调用 download_file
+    """
+    assert not inspect.isgeneratorfunction(DownFile.downfile)
+    downloads: list = []
+    pan = make_pan(monkeypatch, downloads)
+    output = tmp_path / "b.txt"
+    assert pan.downfile("/a/b.txt", str(output), verbose=False) is None
+    assert pan.file.calls == [{"fsids": json.dumps([7]), "dlink": 1}]
+    assert len(downloads) == 1
+    assert downloads[0]["url"].endswith("&access_token=TOKEN")
+    assert downloads[0]["output_path"] == str(output)
+    assert downloads[0]["expected_md5"] == MD5
+
+
+def test_downfile_missing(monkeypatch, capsys):
+    """
+    测试文件不存在、是目录或列目录失败时不下载
+    """
+    downloads: list = []
+    pan = make_pan(monkeypatch, downloads)
+    pan.downfile("/a/none.txt", "x", verbose=False)
+    pan.downfile("/a/dir", "x", verbose=False)
+    assert capsys.readouterr().out.count("百度网盘文件不存在") == 2
+    pan.downfile("/error", "x", verbose=False)
+    assert "无法列出百度网盘文件" in capsys.readouterr().out
+    assert not downloads and not pan.file.calls
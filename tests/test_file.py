@@ -113,6 +113,28 @@ def test_filemetas():
     assert res is not None, "返回结果为空"
 
 
+def test_walk():
+    """
+    测试并发遍历目录
+    """
+    count = 0
+    for dirpath, dirs, files in file.walk("/", max_workers=4):
+        print(dirpath, len(dirs), len(files))
+        assert dirpath.startswith("/")
+        dirs.clear()  # 只遍历根目录
+        count += 1
+    assert count == 1
+
+
+def test_watch():
+    """
+    测试监视目录变化
+    """
+    watcher = file.watch("/", recursion=0)
+    assert watcher.poll() == []
+    assert watcher.mtime is not None and watcher.ctime is not None
+
+
 ##### 暂不测试
 # #### 暂不测试
 # # # def test_filemanager():
@@ -0,0 +1,71 @@
+import pytest
+
+from cpanbd.utils.index import RemoteIndex
+
+
+class FakeFile:
+    """按 mtime/ctime 过滤的 listall, fail_after 条之后抛出异常"""
+
+    def __init__(self, items: list[dict]) -> None:
+        self.items = items
+        self.fail_after = None
+        self.calls: list[dict] = []
+
+    def iter_listall(self, path, recursion=1, page_size=1000, **kwargs):
+        self.calls.append(kwargs)
+        for n, item in enumerate(self.items):
+            if self.fail_after is not None and n >= self.fail_after:
+                raise RuntimeError("listall failed")
+            if item["server_mtime"] < kwargs.get("mtime", 0):
+                continue
+            if item["server_ctime"] < kwargs.get("ctime", 0):
+                continue
+            yield item
+
+
+def item(path: str, fs_id: int, mtime: int, size: int = 1) -> dict:
+    return {
+        "path": path,
+        "fs_id": fs_id,
+        "size": size,
+        "server_mtime": mtime,
+        "server_ctime": mtime,
+        "isdir": 0,
+    }
+
+
+def test_crawl_keeps_index_on_error():
+    """
+    测试抓取出错时索引保持原样
+    """
+    file = FakeFile([item("/a/1.txt", 1, 100), item("/a/2.txt", 2, 100)])
+    with RemoteIndex(file=file) as index:
+        assert index.crawl("/a") == 2
+        file.items = [item("/a/3.txt", 3, 200), item("/a/4.txt", 4, 200)]
+        file.fail_after = 1
+        with pytest.raises(RuntimeError):
+            index.crawl("/a")
+        assert [e["path"] for e in index.listdir("/a")] == ["/a/1.txt", "/a/2.txt"]
+
+        file.fail_after = None
+        assert index.crawl("/a") == 2
+        assert [e["path"] for e in index.listdir("/a")] == ["/a/3.txt", "/a/4.txt"]
+
+
+def test_refresh_overlap():
+    """
+    测试增量刷新能发现与高水位同一秒修改的文件, 且不重复计数
+    """
+    file = FakeFile([item("/a/1.txt", 1, 100)])
+    with RemoteIndex(file=file) as index:
+        index.crawl("/a")
+        # 与上次抓取同一秒内稍后上传的文件
+        file.items.append(item("/a/2.txt", 2, 100))
+        assert index.refresh("/a") == 1
+        assert index.exists("/a/2.txt")
+        assert file.calls[-1] == {"web": 0, "ctime": 98}
+        assert index.refresh("/a") == 0
+
+        file.items[0] = item("/a/1.txt", 1, 100, size=5)
+        assert index.refresh("/a") == 1
+        assert index.du("/a") == 6
@@ -0,0 +1,182 @@
+import json
+import time
+
+import pytest
+import requests
+from tenacity import RetryError, Retrying, stop_after_attempt
+
+from cpanbd.uploadfile import (
+    PartUploadError,
+    choose_block_size,
+    missing_blocks,
+    session_rejected,
+    vip_type_from_uinfo,
+)
+from cpanbd.utils.journal import (
+    JOURNAL_VERSION,
+    UPLOAD_SESSION_TTL,
+    JournalWriter,
+    UploadJournal,
+    journal_path,
+)
+
+MB = 1024 * 1024
+
+
+def make_journal(**kwargs) -> UploadJournal:
+    data = dict(
+        upload_path="/apps/x/a.zip",
+        size=10 * MB,
+        mtime_ns=123,
+        block_size=4 * MB,
+        content_md5="c" * 32,
+        slice_md5="s" * 32,
+        block_list=["a" * 32, "b" * 32, "c" * 32],
+        uploadid="U1",
+        server="https://c.pcs.baidu.com",
+        created_at=time.time(),
+    )
+    data.update(kwargs)
+    return UploadJournal(**data)
+
+
+def test_journal_path(tmp_path):
+    """
+    测试上传记录的保存位置
+    """
+    src = tmp_path / "a.zip"
+    assert journal_path(src) == tmp_path / "a.zip.bdupload.json"
+    state = journal_path(src, tmp_path / "state")
+    assert state.parent == tmp_path / "state"
+    assert state.name.startswith("a.zip.") and state.name.endswith(".bdupload.json")
+    # 不同目录下的同名文件不共用记录
+    assert journal_path(tmp_path / "b" / "a.zip", tmp_path / "state") != state
+
+
+def test_journal_matches():
+    """
+    测试上传记录与文件是否匹配
+    """
+    journal = make_journal()
+    assert journal.matches("/apps/x/a.zip", 10 * MB, 123, 4 * MB)
+    assert not journal.matches("/apps/x/b.zip", 10 * MB, 123, 4 * MB)
+    assert not journal.matches("/apps/x/a.zip", 11 * MB, 123, 4 * MB)
+    assert not journal.matches("/apps/x/a.zip", 10 * MB, 124, 4 * MB)
+    assert not journal.matches("/apps/x/a.zip", 10 * MB, 123, 16 * MB)
+    assert not make_journal(uploadid="").matches("/apps/x/a.zip", 10 * MB, 123, 4 * MB)
+    expired = make_journal(created_at=time.time() - UPLOAD_SESSION_TTL - 1)
+    assert not expired.matches("/apps/x/a.zip", 10 * MB, 123, 4 * MB)
+
+
+def test_journal_load(tmp_path):
+    """
+    测试读取上传记录: 不存在、已损坏、版本不同
+    """
+    path = tmp_path / "a.zip.bdupload.json"
+    assert UploadJournal.load(path) is None
+
+    journal = make_journal(done=[0, 2])
+    journal.save(path)
+    loaded = UploadJournal.load(path)
+    assert loaded == journal
+
+    path.write_text("{not json", encoding="utf-8")
+    assert UploadJournal.load(path) is None
+
+    path.write_text(json.dumps({"uploadid": "U1"}), encoding="utf-8")
+    assert UploadJournal.load(path) is None
+
+    journal.version = JOURNAL_VERSION + 1
+    journal.save(path)
+    assert UploadJournal.load(path) is None
+
+
+def test_journal_writer(tmp_path):
+    """
+    测试记录已完成的分片、写盘和删除
+    """
+    path = tmp_path / "a.zip.bdupload.json"
+    writer = JournalWriter(make_journal(done=[1]), path)
+    writer.mark_done(0)  # 第一次立即写盘
+    assert UploadJournal.load(path).done == [0, 1]
+    writer.mark_done(2)  # SAVE_INTERVAL 内不写盘
+    assert UploadJournal.load(path).done == [0, 1]
+    writer.flush()
+    assert UploadJournal.load(path).done == [0, 1, 2]
+    assert not list(tmp_path.glob("*.tmp"))
+    writer.remove()
+    assert not path.exists()
+    writer.remove()  # 已删除时不报错
+
+    # 不记录时不写文件
+    JournalWriter(make_journal(), None).flush()
+    assert not list(tmp_path.iterdir())
+
+
+def test_choose_block_size():
+    """
+    测试根据会员类型和文件大小选择分片大小
+    """
+    assert choose_block_size(100 * MB, 0) == 4 * MB
+    assert choose_block_size(100 * MB, 1) == 16 * MB
+    assert choose_block_size(100 * MB, 2) == 32 * MB
+    assert choose_block_size(100 * MB, 99) == 4 * MB  # 未知类型按普通用户
+    # 小文件选能装下整个文件的最小分片
+    assert choose_block_size(1000, 2) == 4 * MB
+    assert choose_block_size(10 * MB, 2) == 16 * MB
+    # 指定的分片超过会员允许的大小时降低
+    assert choose_block_size(100 * MB, 0, 32) == 4 * MB
+    assert choose_block_size(100 * MB, 2, 16) == 16 * MB
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_session_rejected():
+    """
+    测试区分 uploadid 失效和临时错误
+    """
+    assert session_rejected(PartUploadError("x", {"error_code": 31299}))
+    assert session_rejected(PartUploadError("x", {"errno": 2}))
+    assert not session_rejected(PartUploadError("x", {}))
+    assert session_rejected(http_error(404))
+    assert not session_rejected(http_error(429))
+    assert not session_rejected(http_error(502))
+    assert not session_rejected(requests.ConnectionError("net"))
+    assert not session_rejected(Exception("分片 0 的 MD5 不一致"))
+
+    def fail():
+        raise http_error(400)
+
+    with pytest.raises(RetryError) as e:
+        Retrying(stop=stop_after_attempt(2))(fail)
+    assert session_rejected(e.value)
+
+
+def test_missing_blocks():
+    """
+    测试根据预创建的返回值计算需要上传的分片
+    """
+    assert missing_blocks({"return_type": 2, "block_list": []}, 3) == []
+    assert missing_blocks({"return_type": 2, "block_list": [0, 1]}, 3) == []
+    assert missing_blocks({"return_type": 1, "block_list": [2, "0"]}, 3) == [0, 2]
+    # 普通上传时 block_list 为空或缺失, 上传全部分片
+    assert missing_blocks({"return_type": 1, "block_list": []}, 3) == [0, 1, 2]
+    assert missing_blocks({"return_type": 1}, 3) == [0, 1, 2]
+    assert missing_blocks({"block_list": ["x"]}, 3) == [0, 1, 2]
+    assert missing_blocks({"return_type": 1, "block_list": [5]}, 3) == [0, 1, 2]
+
+
+def test_vip_type_from_uinfo():
+    """
+    测试从用户信息中取出会员类型
+    """
+    assert vip_type_from_uinfo({"vip_type": 2}) == 2
+    assert vip_type_from_uinfo({"vip_type": "1"}) == 1
+    assert vip_type_from_uinfo({"vip_type": 7}) == 0
+    assert vip_type_from_uinfo({"vip_type": "svip"}) == 0
+    assert vip_type_from_uinfo({}) == 0
+    assert vip_type_from_uinfo(None) == 0
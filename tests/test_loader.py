@@ -0,0 +1,104 @@
+import json
+import threading
+
+import pytest
+
+from cpanbd.utils.loader import FilemetasLoader
+
+
+class FakeFile:
+    """filemetas 返回 fs_id 在 existing 中的项, fail 为 True 时抛出异常"""
+
+    def __init__(self, existing=None) -> None:
+        self.existing = existing
+        self.fail = False
+        self.requests: list[list[int]] = []
+        self._lock = threading.Lock()
+
+    def filemetas(self, fsids, **params):
+        fs_ids = json.loads(fsids)
+        with self._lock:
+            self.requests.append(fs_ids)
+        if self.fail:
+            raise RuntimeError("filemetas failed")
+        return {
+            "errno": 0,
+            "list": [
+                {"fs_id": i, "params": params}
+                for i in fs_ids
+                if self.existing is None or i in self.existing
+            ],
+        }
+
+
+def test_batches_of_100():
+    """
+    测试 250 个 fs_id 拆分为 100/100/50 三次请求, 参数原样传给 filemetas
+    """
+    file = FakeFile()
+    with FilemetasLoader(file, dlink=1) as loader:
+        futures = loader.load_many(range(250))
+        metas = [f.result(timeout=5) for f in futures]
+    assert sorted(len(r) for r in file.requests) == [50, 100, 100]
+    assert [m["fs_id"] for m in metas] == list(range(250))
+    assert metas[7]["params"] == {"dlink": 1}
+
+
+def test_concurrent_loads_coalesced():
+    """
+    测试多个线程的查询合并为一次请求, 同一个 fs_id 共用一个 Future
+    """
+    file = FakeFile()
+    loader = FilemetasLoader(file, wait=0.2)
+    barrier = threading.Barrier(8)
+    futures: dict[int, list] = {}
+
+    def worker(n: int) -> None:
+        barrier.wait()
+        futures[n] = [loader.load(n * 10 + i) for i in range(10)] + [loader.load(0)]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results = {
+        n: [f.result(timeout=5)["fs_id"] for f in fs] for n, fs in futures.items()
+    }
+    loader.close()
+    assert len(file.requests) == 1 and sorted(file.requests[0]) == list(range(80))
+    assert results[3] == [30 + i for i in range(10)] + [0]
+    assert len({id(fs[-1]) for fs in futures.values()}) == 1
+
+    # 缓存的结果不再请求
+    assert loader.load(5).result()["fs_id"] == 5
+    assert len(file.requests) == 1
+
+
+def test_missing_is_none():
+    """
+    测试不存在的 fs_id 结果为 None
+    """
+    file = FakeFile(existing={1, 3})
+    with FilemetasLoader(file) as loader:
+        metas = [f.result(timeout=5) for f in loader.load_many([1, 2, 3])]
+    assert [m and m["fs_id"] for m in metas] == [1, None, 3]
+
+
+def test_error_propagates_and_uncached():
+    """
+    测试请求失败时整批的 Future 都收到异常, 失败的 fs_id 不缓存
+    """
+    file = FakeFile()
+    loader = FilemetasLoader(file)
+    file.fail = True
+    futures = loader.load_many([1, 2, 3])
+    for future in futures:
+        with pytest.raises(RuntimeError, match="filemetas failed"):
+            future.result(timeout=5)
+
+    file.fail = False
+    metas = [f.result(timeout=5) for f in loader.load_many([1, 2, 3])]
+    loader.close()
+    assert [m["fs_id"] for m in metas] == [1, 2, 3]
+    assert file.requests == [[1, 2, 3], [1, 2, 3]]
@@ -0,0 +1,59 @@
+import hashlib
+import random
+
+import pytest
+
+from cpanbd.utils.md5 import (
+    SLICE_SIZE,
+    calculate_md5,
+    calculate_slice_md5,
+    get_file_md5_blocks,
+    hash_file,
+)
+
+MB = 1024 * 1024
+
+
+def write(tmp_path, size: int):
+    path = tmp_path / f"{size}.bin"
+    path.write_bytes(random.Random(size).randbytes(size))
+    return path
+
+
+@pytest.mark.parametrize(
+    "block_size, size",
+    [
+        (4 * MB, 0),
+        (4 * MB, 1),
+        (4 * MB, 4 * MB),
+        (4 * MB, 4 * MB + 1),
+        (4 * MB, 3 * 4 * MB + 5),
+        # 分片比校验段小, 校验段跨多个分片
+        (64 * 1024, SLICE_SIZE + 3),
+        (64 * 1024, 10 * 64 * 1024),
+    ],
+)
+def test_hash_file(tmp_path, block_size, size):
+    """
+    测试 hash_file 与分别计算的结果一致
+    """
+    path = write(tmp_path, size)
+    hashes = hash_file(path, block_size)
+    assert hashes.size == size
+    assert hashes.block_size == block_size
+    assert hashes.md5 == calculate_md5(path)
+    assert hashes.slice_md5 == calculate_slice_md5(path)
+    if size:
+        assert hashes.block_list == get_file_md5_blocks(path, block_size)
+    else:
+        # 空文件的分片列表为空文件的 md5 (get_file_md5_blocks 返回 [])
+        assert get_file_md5_blocks(path, block_size) == []
+        assert hashes.block_list == [hashlib.md5(b"").hexdigest()]
+
+
+def test_hash_file_missing(tmp_path):
+    """
+    测试文件不存在
+    """
+    with pytest.raises(FileNotFoundError):
+        hash_file(tmp_path / "none.bin")
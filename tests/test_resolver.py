@@ -0,0 +1,80 @@
+import pytest
+
+from cpanbd.utils.resolver import PathResolver
+
+
+class FakeFile:
+    """按给定顺序分页返回的 list_files, 顺序不一定与 Python 的字符串排序相同"""
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+        self.calls: list[int] = []
+        self.error = False
+
+    def list_files(self, dir, order, desc, start, limit, web):
+        self.calls.append(start)
+        if self.error:
+            return None
+        return {
+            "list": [
+                {
+                    "path": f"{dir}/{name}",
+                    "server_filename": name,
+                    "isdir": 0,
+                    "fs_id": n,
+                }
+                for n, name in enumerate(self.names[start : start + limit])
+            ]
+        }
+
+
+def test_resolve_server_order():
+    """
+    测试服务端排序规则不同 (自然数排序) 时, 后面页中的文件也能找到
+    """
+    file = FakeFile(["a1", "a2", "a10", "B", "c"])
+    resolver = PathResolver(file, page_size=2)
+    assert resolver.resolve("/d/a2")["server_filename"] == "a2"
+    assert file.calls == [0]
+    assert resolver.resolve("/d/a10")["server_filename"] == "a10"
+    assert resolver.resolve("/d/c")["server_filename"] == "c"
+    assert file.calls == [0, 2, 4]
+
+
+def test_resolve_missing_relists_once():
+    """
+    测试缓存中找不到时重新列一次目录, 有效期内不再重复
+    """
+    file = FakeFile(["a", "b", "c"])
+    resolver = PathResolver(file, page_size=2)
+    # 第一次就从头列完整个目录, 不需要再列
+    assert resolver.resolve("/d/x") is None
+    assert file.calls == [0, 2]
+
+    # 缓存之后上传的文件: 重新列一次后找到
+    file.names.append("d")
+    assert resolver.resolve("/d/d")["server_filename"] == "d"
+    assert file.calls == [0, 2, 0, 2]
+    # 同一个有效期内, 再次找不到时只继续翻完剩下的页, 不再重新列
+    assert resolver.resolve("/d/y") is None
+    assert resolver.resolve("/d/z") is None
+    assert file.calls == [0, 2, 0, 2, 4]
+
+    # 过期后重新列
+    resolver.invalidate("/d")
+    assert resolver.resolve("/d/y") is None
+    assert file.calls == [0, 2, 0, 2, 4, 0, 2, 4]
+
+
+def test_resolve_relist_error_keeps_cache():
+    """
+    测试重新列目录失败时保留原来的缓存
+    """
+    file = FakeFile(["a", "b"])
+    resolver = PathResolver(file, page_size=10)
+    assert resolver.resolve("/d/a") is not None
+    file.error = True
+    with pytest.raises(ValueError):
+        resolver.resolve("/d/x")
+    assert resolver.resolve("/d/b")["server_filename"] == "b"
+    assert file.calls == [0, 0]
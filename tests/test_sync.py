@@ -0,0 +1,171 @@
+import hashlib
+import os
+
+from cpanbd.utils.md5 import encrypt_md5
+from cpanbd.utils.sync import plan_sync
+
+REMOTE = "/apps/x/backup"
+MTIME = 1_700_000_000
+
+
+def write(root, rel: str, data: bytes, mtime: int = MTIME) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+
+def remote_item(
+    rel: str,
+    data: bytes,
+    local_mtime: int = MTIME,
+    server_mtime: int = MTIME,
+    fs_id: int = 1,
+) -> dict:
+    return {
+        "path": f"{REMOTE}/{rel}",
+        "isdir": 0,
+        "size": len(data),
+        "md5": encrypt_md5(hashlib.md5(data).hexdigest()),
+        "local_mtime": local_mtime,
+        "server_mtime": server_mtime,
+        "fs_id": fs_id,
+    }
+
+
+def actions(plan) -> set:
+    return {(op.action, op.local or op.remote, op.reason) for op in plan.ops}
+
+
+def test_plan_push(tmp_path):
+    """
+    测试 push: 新增、修改、相同、网盘多出的文件
+    """
+    write(tmp_path, "same.txt", b"same")
+    write(tmp_path, "new.txt", b"new")
+    write(tmp_path, "sub/size.txt", b"longer")
+    remote = [
+        remote_item("same.txt", b"same"),
+        remote_item("sub/size.txt", b"short"),
+        remote_item("extra.txt", b"extra"),
+        {"path": f"{REMOTE}/sub", "isdir": 1, "size": 0},
+        remote_item("outside.txt", b"x") | {"path": "/apps/x/outside.txt"},
+    ]
+    plan = plan_sync(str(tmp_path), REMOTE, remote)
+    assert plan.unchanged == 1
+    assert actions(plan) == {
+        ("upload", str(tmp_path / "new.txt"), "new"),
+        ("upload", str(tmp_path / "sub/size.txt"), "size"),
+    }
+    assert plan.uploads[0].remote.startswith(REMOTE + "/")
+
+    plan = plan_sync(str(tmp_path), REMOTE, remote, delete=True)
+    assert ("delete_remote", f"{REMOTE}/extra.txt", "missing") in actions(plan)
+    assert plan.summary()["upload_bytes"] == len(b"new") + len(b"longer")
+
+
+def test_plan_pull(tmp_path):
+    """
+    测试 pull: 下载网盘新增/修改的文件, delete 时删除本地多出的文件
+    """
+    write(tmp_path, "changed.txt", b"old!")
+    write(tmp_path, "local_only.txt", b"local")
+    remote = [
+        remote_item("changed.txt", b"new!", local_mtime=MTIME + 100, fs_id=2),
+        remote_item("remote_only.txt", b"remote", fs_id=3),
+    ]
+    plan = plan_sync(str(tmp_path), REMOTE, remote, direction="pull")
+    assert actions(plan) == {
+        ("download", str(tmp_path / "changed.txt"), "mtime"),
+        ("download", str(tmp_path / "remote_only.txt"), "new"),
+    }
+    assert {op.fs_id for op in plan.downloads} == {2, 3}
+
+    plan = plan_sync(str(tmp_path), REMOTE, remote, direction="pull", delete=True)
+    assert ("delete_local", str(tmp_path / "local_only.txt"), "missing") in actions(
+        plan
+    )
+
+
+def test_plan_both(tmp_path):
+    """
+    测试 both: 较新的一方覆盖另一方, 不删除
+    """
+    write(tmp_path, "local_newer.txt", b"aaaa", mtime=MTIME + 500)
+    write(tmp_path, "remote_newer.txt", b"bbbb", mtime=MTIME)
+    write(tmp_path, "local_only.txt", b"c")
+    remote = [
+        remote_item("local_newer.txt", b"AAAA", server_mtime=MTIME + 100),
+        remote_item(
+            "remote_newer.txt",
+            b"BBBB",
+            local_mtime=MTIME + 300,
+            server_mtime=MTIME + 300,
+        ),
+        remote_item("remote_only.txt", b"d"),
+    ]
+    plan = plan_sync(str(tmp_path), REMOTE, remote, direction="both", delete=True)
+    assert actions(plan) == {
+        ("upload", str(tmp_path / "local_newer.txt"), "mtime"),
+        ("download", str(tmp_path / "remote_newer.txt"), "mtime"),
+        ("upload", str(tmp_path / "local_only.txt"), "new"),
+        ("download", str(tmp_path / "remote_only.txt"), "new"),
+    }
+    assert not plan.deletes and not plan.renames
+
+
+def test_plan_mtime_tolerance_and_compare(tmp_path):
+    """
+    测试 mtime 误差和 compare 方式
+    """
+    write(tmp_path, "a.txt", b"same", mtime=MTIME + 2)
+    remote = [remote_item("a.txt", b"same")]
+    assert plan_sync(str(tmp_path), REMOTE, remote).unchanged == 1
+    plan = plan_sync(str(tmp_path), REMOTE, remote, mtime_tolerance=1)
+    assert actions(plan) == {("upload", str(tmp_path / "a.txt"), "mtime")}
+    plan = plan_sync(str(tmp_path), REMOTE, remote, mtime_tolerance=1, compare="size")
+    assert plan.unchanged == 1 and not plan.ops
+    plan = plan_sync(str(tmp_path), REMOTE, remote, mtime_tolerance=1, compare="md5")
+    assert plan.unchanged == 1 and not plan.ops
+
+    remote = [remote_item("a.txt", b"diff")]
+    plan = plan_sync(str(tmp_path), REMOTE, remote, mtime_tolerance=1, compare="md5")
+    assert actions(plan) == {("upload", str(tmp_path / "a.txt"), "md5")}
+
+
+def test_plan_renames(tmp_path):
+    """
+    测试新增 + 删除合并为重命名
+    """
+    write(tmp_path, "renamed.txt", b"content")
+    write(tmp_path, "other.txt", b"1234567")  # 大小相同但内容不同
+    remote = [remote_item("original.txt", b"content")]
+
+    plan = plan_sync(str(tmp_path), REMOTE, remote, delete=True)
+    assert [(op.remote, op.dest) for op in plan.renames] == [
+        (f"{REMOTE}/original.txt", f"{REMOTE}/renamed.txt")
+    ]
+    assert actions(plan) - {("rename_remote", f"{REMOTE}/original.txt", "md5")} == {
+        ("upload", str(tmp_path / "other.txt"), "new")
+    }
+
+    plan = plan_sync(str(tmp_path), REMOTE, remote, direction="pull", delete=True)
+    assert [(op.local, op.dest) for op in plan.renames] == [
+        (str(tmp_path / "renamed.txt"), str(tmp_path / "original.txt"))
+    ]
+
+    # 不删除或不检测重命名时, 分别上传和删除
+    plan = plan_sync(str(tmp_path), REMOTE, remote, delete=True, detect_renames=False)
+    assert not plan.renames
+    assert ("delete_remote", f"{REMOTE}/original.txt", "missing") in actions(plan)
+
+
+def test_plan_default_exclude(tmp_path):
+    """
+    测试默认跳过下载/上传的断点信息
+    """
+    write(tmp_path, "a.zip", b"zip")
+    write(tmp_path, "a.zip.meta", b"{}")
+    write(tmp_path, "a.zip.bdupload.json", b"{}")
+    plan = plan_sync(str(tmp_path), REMOTE, [])
+    assert [op.local for op in plan.uploads] == [str(tmp_path / "a.zip")]
@@ -0,0 +1,94 @@
+import pytest
+
+from cpanbd.utils.table import FileTable
+
+
+def make_item(n: int, **kwargs) -> dict:
+    item = {
+        "path": f"/资料/{n}.pdf",
+        "server_filename": f"{n}.pdf",
+        "md5": f"{n:032x}",
+        "fs_id": 1000 + n,
+        "size": n * 1024,
+        "server_mtime": 1_700_000_000 + n,
+        "server_ctime": 1_700_000_000,
+        "local_mtime": 1_600_000_000 + n,
+        "isdir": 0,
+        "category": 4,
+    }
+    item.update(kwargs)
+    return item
+
+
+def test_append_and_value():
+    """
+    测试追加后按行、按列读取
+    """
+    table = FileTable()
+    table.append(make_item(1))
+    table.extend([make_item(2), make_item(3)])
+    assert len(table) == 3
+    assert table.value("path", 1) == "/资料/2.pdf"
+    assert table.value("server_filename", 2) == "3.pdf"
+    assert table.value("size", 0) == 1024
+    assert list(table.column("fs_id")) == [1001, 1002, 1003]
+    assert table.column("md5")[2] == f"{3:032x}"
+    row = table[0]
+    assert row["fs_id"] == row.fs_id == 1001
+    assert row.get("nope", "x") == "x"
+    with pytest.raises(KeyError):
+        table.value("nope", 0)
+    with pytest.raises(AttributeError):
+        row.nope  # noqa: B018
+
+
+def test_negative_index():
+    """
+    测试负数下标和越界
+    """
+    table = FileTable.from_items(make_item(n) for n in range(3))
+    assert table[-1]["fs_id"] == 1002
+    assert table[-3]["fs_id"] == 1000
+    with pytest.raises(IndexError):
+        table[3]
+    with pytest.raises(IndexError):
+        table[-4]
+
+
+def test_to_dict_round_trip():
+    """
+    测试 to_dict 与接口返回的 dict 相同; 缺少的整数列为 0, 缺少的 md5 为 None
+    """
+    items = [make_item(n) for n in range(3)]
+    table = FileTable.from_items(items)
+    assert table.to_dicts() == items
+    assert [row.to_dict() for row in table] == items
+
+    folder = {"path": "/资料/子目录", "fs_id": 9, "isdir": 1}
+    table.append(folder)
+    row = table[-1].to_dict()
+    assert row["md5"] is None
+    assert row["size"] == 0 and row["category"] == 0
+    assert row["server_filename"] == "子目录"
+    # 空字符串与缺少不同
+    table.append(make_item(5, md5=""))
+    assert table[-1]["md5"] == ""
+
+
+def test_take_and_filter():
+    """
+    测试按行号取出和过滤
+    """
+    items = [make_item(n) for n in range(5)] + [
+        {"path": "/资料/d", "fs_id": 9, "isdir": 1}
+    ]
+    table = FileTable.from_items(items)
+    taken = table.take([4, 0, 5])
+    assert taken.to_dicts() == [items[4], items[0], table[5].to_dict()]
+    assert taken[-1]["md5"] is None
+
+    files = table.filter(lambda row: row["isdir"] == 0 and row["size"] >= 2048)
+    assert [row["fs_id"] for row in files] == [1002, 1003, 1004]
+    assert files.to_dicts() == items[2:5]
+    assert len(table.filter(lambda row: False)) == 0
+    assert table.nbytes() > files.nbytes() > 0
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+from jsonpath import jsonpath
+
+from cpanbd.utils.validation import (
+    ResponseSchemaChecker,
+    ValidationPolicy,
+    current_policy,
+    get_validator,
+    validate_schema,
+    validation_policy,
+)
+
+KEYS = ["a", "b", "c", "d"]
+RULE_KEYS = [*KEYS, "a.b", "b.c.d", "c.a"]
+MISSING = "<missing>"
+
+
+def random_json(rng: random.Random, depth: int = 0):
+    t = rng.random()
+    if depth > 3 or t < 0.3:
+        return rng.choice([1, "s", 1.5, True, None, 0, ""])
+    if t < 0.65:
+        return {
+            rng.choice(KEYS): random_json(rng, depth + 1)
+            for _ in range(rng.randint(0, 3))
+        }
+    return [random_json(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+
+
+def test_checker_matches_jsonpath():
+    """
+    测试 ResponseSchemaChecker 找到的值与 jsonpath(res, "$..key")[0] 一致, 含 a.b 形式的 key
+    """
+    checker = ResponseSchemaChecker({key: {"type": "int"} for key in RULE_KEYS})
+    for seed in range(2000):
+        rng = random.Random(seed)
+        data = {key: random_json(rng) for key in rng.sample(KEYS, 3)}
+        found = checker.find(data)
+        for key in RULE_KEYS:
+            expected = jsonpath(data, f"$..{key}")
+            expected = expected[0] if expected else MISSING
+            actual = found.get(key, MISSING)
+            assert (type(actual), actual) == (type(expected), expected), (
+                seed,
+                key,
+                data,
+            )
+
+
+def test_checker_errors():
+    """
+    测试缺少的 key 和类型不符
+    """
+    checker = ResponseSchemaChecker(
+        {
+            "errno": {"type": "int"},
+            "list": {"type": "array"},
+            "info.quota": {"type": "number"},
+            "request_id": {"type": "string"},
+        }
+    )
+    data = {"errno": 0, "list": [{"errno": "x"}], "info": {"quota": 1.5}}
+    assert checker.check(data) == ["Key 'request_id' 不存在于响应中"]
+    assert checker.check({"errno": "0", "list": {}, "info": {"quota": 1}}) == [
+        "Key 'errno' 预期类型: int",
+        "Key 'list' 预期类型: array",
+        "Key 'request_id' 不存在于响应中",
+    ]
+
+
+LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "list": {
+            "type": "array",
+            "items": {"type": "object", "required": ["fs_id"]},
+        }
+    },
+}
+
+
+def test_validate_schema_modes():
+    """
+    测试 off 不校验, sample 只校验每个数组的前 sample_size 项, full 完整校验
+    """
+    pytest.importorskip("jsonschema")
+    from jsonschema import ValidationError
+
+    res = {"list": [{"fs_id": i} for i in range(5)] + [{"path": "/bad"}]}
+    validate_schema(res, LIST_SCHEMA, ValidationPolicy(mode="off"))
+    validate_schema(res, LIST_SCHEMA, ValidationPolicy(mode="sample", sample_size=5))
+    with pytest.raises(ValidationError):
+        validate_schema(
+            res, LIST_SCHEMA, ValidationPolicy(mode="sample", sample_size=6)
+        )
+    with pytest.raises(ValidationError):
+        validate_schema(res, LIST_SCHEMA, ValidationPolicy(mode="full"))
+    # 抽样不修改原数据
+    assert len(res["list"]) == 6
+    # 同一个键只编译一次
+    assert get_validator(LIST_SCHEMA, "test.list") is get_validator({}, "test.list")
+
+
+def test_policy_precedence():
+    """
+    测试 validation_policy > 客户端设置 > 默认 (off)
+    """
+    assert current_policy().mode == "off"
+    assert current_policy("sample").mode == "sample"
+    with validation_policy("full", sample_size=3) as policy:
+        assert current_policy("sample") == policy == ValidationPolicy("full", 3)
+    assert current_policy("sample").mode == "sample"